@@ -1,14 +1,19 @@
+import asyncio
 import logging
+import time
 import uuid
+import weakref
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
 
 from temporalio import activity
 
-from app.clients import anthropic_client, browser_use, freepik, linkup, smartbuckets
+from app.clients import anthropic_client, browser_use, freepik, http_pool, linkup, smartbuckets
 from app.config import settings
-from app import storage
-from app.agent_wall import update_window_state
+from app import page_stats, persistence, policy_cache, storage, telemetry
+from app.context_packer import pack_metrics_context, pack_snapshot_context
+from app.agent_wall import finish_run, tool_failure_counts, update_brief_draft, update_window_state
 from app.models import AgentWindowState
 from app.models import (
     BrowsingPolicy,
@@ -24,13 +29,17 @@ logger = logging.getLogger(__name__)
 
 @activity.defn
 async def load_policy() -> BrowsingPolicy:
-    stored = await smartbuckets.fetch_latest_policy()
-    if stored:
-        try:
-            return BrowsingPolicy(**stored)
-        except Exception as exc:
-            logger.warning("Falling back to default policy due to parse error: %s", exc)
-    return BrowsingPolicy()
+    return await policy_cache.get_policy()
+
+
+@activity.defn
+async def load_previous_snapshot(company: CompanyInput) -> Optional[CompanySnapshot]:
+    try:
+        items, _ = await asyncio.to_thread(storage.list_indexed, "snapshots", limit=1, company=company.name)
+        return CompanySnapshot(**items[0]) if items else None
+    except Exception as exc:
+        logger.warning("Could not load previous snapshot for %s: %s", company.name, exc)
+        return None
 
 
 @activity.defn
@@ -50,7 +59,7 @@ async def fetch_company_data_from_linkup(company: CompanyInput, policy: Browsing
 
 async def _score_usefulness(page: PageExtraction, persona: str) -> float:
     schema = {"type": "object", "properties": {"usefulness_score": {"type": "number"}}, "required": ["usefulness_score"]}
-    prompt = f"""Given the extracted data:\n{page.model_dump_json()}\nRate usefulness 0-1 for persona {persona}."""
+    prompt = f"""Given the extracted data:\n{page.model_dump_json(exclude={"browse_seconds"})}\nRate usefulness 0-1 for persona {persona}."""
     data = await anthropic_client.claude_json_call("Score page usefulness", prompt, schema)
     score = data.get("usefulness_score") if isinstance(data, dict) else None
     try:
@@ -59,64 +68,338 @@ async def _score_usefulness(page: PageExtraction, persona: str) -> float:
         return page.usefulness_score if page.usefulness_score else 0.3
 
 
-@activity.defn
-async def browse_and_extract_pages(
-    company: CompanyInput, policy: BrowsingPolicy, linkup_results: List[LinkupResult], run_id: str
-) -> List[PageExtraction]:
-    urls = [res.url for res in linkup_results]
-    chosen_urls = browser_use.choose_urls(urls, policy.preferred_paths, policy.max_pages_per_domain)
-    extractions: List[PageExtraction] = []
-    for slot, url in enumerate(chosen_urls[:9]):
-        start_state = AgentWindowState(
-            slot=slot,
-            url=url,
-            page_type="unknown",
-            status="starting",
-            last_action="Launching browser session",
-            screenshot_url="/static/placeholder.png",
-            usefulness_score=None,
-            updated_at=datetime.utcnow(),
-        )
-        update_window_state(run_id, start_state)
+def _chunk_pages_by_tokens(pages: Dict[int, PageExtraction], budget: int) -> List[Dict[int, str]]:
+    chunks: List[Dict[int, str]] = []
+    current: Dict[int, str] = {}
+    used = 0
+    for slot, page in sorted(pages.items()):
+        page_json = page.model_dump_json(exclude={"browse_seconds"})
+        cost = anthropic_client.estimate_tokens(page_json)
+        if current and used + cost > budget:
+            chunks.append(current)
+            current, used = {}, 0
+        current[slot] = page_json
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _score_usefulness_chunk(chunk: Dict[int, str], persona: str) -> Dict[int, float]:
+    schema = {
+        "type": "object",
+        "properties": {
+            "scores": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"slot": {"type": "integer"}, "usefulness_score": {"type": "number"}},
+                    "required": ["slot", "usefulness_score"],
+                },
+            }
+        },
+        "required": ["scores"],
+    }
+    pages_block = "\n".join(f'{{"slot": {slot}, "page": {page_json}}}' for slot, page_json in chunk.items())
+    prompt = (
+        f"Given the extracted pages (one per line, keyed by slot):\n{pages_block}\n"
+        f"Rate usefulness 0-1 of each page for persona {persona}. Return one score per slot."
+    )
+    data = await anthropic_client.claude_json_call("Score page usefulness", prompt, schema)
+    scores: Dict[int, float] = {}
+    items = data.get("scores") if isinstance(data, dict) else None
+    for item in items or []:
+        try:
+            slot = int(item["slot"])
+            score = float(item["usefulness_score"])
+        except Exception:
+            continue
+        if slot in chunk:
+            scores[slot] = score
+    return scores
+
+
+async def _score_usefulness_batch(pages: Dict[int, PageExtraction], persona: str) -> Dict[int, float]:
+    chunks = _chunk_pages_by_tokens(pages, settings.batch_scoring_token_budget)
+    scores: Dict[int, float] = {}
+    for chunk_scores in await asyncio.gather(*(_score_usefulness_chunk(chunk, persona) for chunk in chunks)):
+        scores.update(chunk_scores)
+    missing = [slot for slot in pages if slot not in scores]
+    if missing:
+        logger.info("Batch scoring omitted slots %s; scoring them individually", missing)
+        fallback = await asyncio.gather(*(_score_usefulness(pages[slot], persona) for slot in missing))
+        scores.update(zip(missing, fallback))
+    return scores
+
+
+MAX_BROWSER_SLOTS = 9
+
+# One browser-session semaphore per event loop, shared by every concurrent browse activity.
+_browse_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _browse_limit() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    limit = _browse_limits.get(loop)
+    if limit is None:
+        limit = _browse_limits[loop] = asyncio.Semaphore(max(settings.browse_max_concurrency, 1))
+    return limit
+
+
+def _domain_of(url: str) -> str:
+    return (urlsplit(str(url)).hostname or "").lower()
+
 
-        raw = await browser_use.extract_page(str(url), company.name)
+def _page_from_raw(url: str, raw: Dict) -> PageExtraction:
+    raw_score = raw.get("usefulness_score")
+    try:
+        base_score = float(raw_score)
+    except Exception:
+        base_score = 0.3
+    return PageExtraction(
+        url=url,
+        page_type=raw.get("page_type", "unknown"),
+        icp=raw.get("icp"),
+        product_lines=raw.get("product_lines", []),
+        pain_points=raw.get("pain_points", []),
+        signals=raw.get("signals", []),
+        raw_text_excerpt=raw.get("raw_text_excerpt", "")[:500],
+        usefulness_score=base_score,
+        notes=raw.get("notes"),
+    )
+
+
+async def _browse_slot(
+    slot: int,
+    url: str,
+    company: CompanyInput,
+    run_id: str,
+    global_limit: asyncio.Semaphore,
+    domain_limit: asyncio.Semaphore,
+    score_inline: bool,
+) -> Tuple[PageExtraction, AgentWindowState]:
+    start_state = AgentWindowState(
+        slot=slot,
+        url=url,
+        page_type="unknown",
+        status="starting",
+        last_action="Waiting for a browser session",
+        screenshot_url="/static/placeholder.png",
+        usefulness_score=None,
+        updated_at=datetime.utcnow(),
+    )
+    update_window_state(run_id, start_state)
+
+    # Only real browses are timed; cached extractions would skew the page-yield stats.
+    browse_seconds = None
+    raw = await asyncio.to_thread(browser_use.cached_extraction, str(url), company.name)
+    if raw is not None:
         loading_state = start_state.model_copy(
             update={
-                "status": "extracting",
-                "last_action": "Extracting content",
+                "status": "loading",
+                "last_action": "Loaded cached extraction",
                 "updated_at": datetime.utcnow(),
             }
         )
         update_window_state(run_id, loading_state)
+    else:
+        # Domain first, so slots queued behind their own domain don't hold shared sessions.
+        async with domain_limit, global_limit:
+            loading_state = start_state.model_copy(
+                update={
+                    "status": "loading",
+                    "last_action": "Launching browser session",
+                    "updated_at": datetime.utcnow(),
+                }
+            )
+            update_window_state(run_id, loading_state)
+            started = time.monotonic()
+            try:
+                raw = await asyncio.wait_for(
+                    browser_use.extract_page(str(url), company.name), settings.browse_page_timeout_seconds
+                )
+            except asyncio.TimeoutError:
+                logger.warning("Browser Use extraction timed out for %s", url)
+                # The cancelled request never reaches provider_call's failure accounting.
+                telemetry.record_failure("browser_use", "timeout")
+                raw = browser_use.failed_extraction(
+                    f"Browser Use call timed out after {settings.browse_page_timeout_seconds:g}s"
+                )
+            browse_seconds = time.monotonic() - started
 
-        raw_score = raw.get("usefulness_score")
-        try:
-            base_score = float(raw_score)
-        except Exception:
-            base_score = 0.3
-        page = PageExtraction(
-            url=url,
-            page_type=raw.get("page_type", "unknown"),
-            icp=raw.get("icp"),
-            product_lines=raw.get("product_lines", []),
-            pain_points=raw.get("pain_points", []),
-            signals=raw.get("signals", []),
-            raw_text_excerpt=raw.get("raw_text_excerpt", "")[:500],
-            usefulness_score=base_score,
-            notes=raw.get("notes"),
-        )
-        page.usefulness_score = await _score_usefulness(page, company.persona)
-        extractions.append(page)
-        done_state = loading_state.model_copy(
-            update={
-                "status": "done",
-                "last_action": "Extraction completed",
-                "usefulness_score": page.usefulness_score,
-                "updated_at": datetime.utcnow(),
+    page = _page_from_raw(url, raw)
+    page.browse_seconds = browse_seconds
+    extracting_state = loading_state.model_copy(
+        update={
+            "status": "extracting",
+            "page_type": page.page_type,
+            "last_action": "Extracting content",
+            "updated_at": datetime.utcnow(),
+        }
+    )
+    update_window_state(run_id, extracting_state)
+    if not score_inline:
+        return page, extracting_state
+
+    page.usefulness_score = await _score_usefulness(page, company.persona)
+    return page, _mark_slot_done(run_id, extracting_state, page.usefulness_score)
+
+
+def _mark_slot_done(run_id: str, state: AgentWindowState, usefulness_score: float) -> AgentWindowState:
+    done_state = state.model_copy(
+        update={
+            "status": "done",
+            "last_action": "Extraction completed",
+            "usefulness_score": usefulness_score,
+            "updated_at": datetime.utcnow(),
+        }
+    )
+    update_window_state(run_id, done_state)
+    return done_state
+
+
+def _last_heartbeat() -> Optional[Dict]:
+    details = activity.info().heartbeat_details if activity.in_activity() else []
+    return details[0] if details and isinstance(details[0], dict) else None
+
+
+class _BrowseProgress:
+    """Browsed (and scored) pages, heartbeated as they complete so a retried attempt resumes from
+    the last heartbeat and only browses the slots that are still missing."""
+
+    def __init__(self, urls: List[str], reused: Optional[Dict[int, PageExtraction]] = None) -> None:
+        self.urls = urls
+        # Pages reused from the previous snapshot keep their extraction and score.
+        self.reused = set(reused or {})
+        self.pages: Dict[int, PageExtraction] = dict(reused or {})
+        self.scored: Set[int] = set(self.pages)
+        details = _last_heartbeat()
+        if details and details.get("urls") == urls:
+            try:
+                restored = {int(slot): PageExtraction(**page) for slot, page in details["pages"].items()}
+                self.scored |= {int(slot) for slot in details.get("scored", [])} & set(restored)
+                self.pages.update(restored)
+            except Exception as exc:
+                logger.warning("Ignoring unreadable browse heartbeat: %s", exc)
+        if len(self.pages) > len(self.reused):
+            logger.info(
+                "Resuming browse attempt %s with %s/%s slots done",
+                activity.info().attempt,
+                len(self.pages),
+                len(urls),
+            )
+
+    def heartbeat(self) -> None:
+        if not activity.in_activity():
+            return
+        activity.heartbeat(
+            {
+                "urls": self.urls,
+                "pages": {str(slot): page.model_dump(mode="json") for slot, page in self.pages.items()},
+                "scored": sorted(self.scored),
             }
         )
-        update_window_state(run_id, done_state)
-    return extractions
+
+    def record(self, slot: int, page: PageExtraction, scored: bool) -> None:
+        self.pages[slot] = page
+        if scored:
+            self.scored.add(slot)
+        self.heartbeat()
+
+    async def keep_alive(self, interval_seconds: float) -> None:
+        # Slow pages can outlast the heartbeat timeout; keep reporting while slots are in flight.
+        # Each slot is bounded by browse_page_timeout_seconds, so this cannot mask a hung page.
+        while True:
+            await asyncio.sleep(interval_seconds)
+            self.heartbeat()
+
+
+def _restore_slot(
+    run_id: str, slot: int, url: str, page: PageExtraction, scored: bool, action: str
+) -> AgentWindowState:
+    state = AgentWindowState(
+        slot=slot,
+        url=url,
+        page_type=page.page_type,
+        status="done" if scored else "extracting",
+        last_action=action,
+        screenshot_url="/static/placeholder.png",
+        usefulness_score=page.usefulness_score if scored else None,
+        updated_at=datetime.utcnow(),
+    )
+    update_window_state(run_id, state)
+    return state
+
+
+@activity.defn
+async def browse_and_extract_pages(
+    company: CompanyInput,
+    policy: BrowsingPolicy,
+    linkup_results: List[LinkupResult],
+    run_id: str,
+    reuse_pages: Optional[List[PageExtraction]] = None,
+) -> List[PageExtraction]:
+    # A retried attempt keeps the URLs it heartbeated: ranking explores at random and page stats
+    # move between attempts, and a different list would discard the browsed slots.
+    resumed = _last_heartbeat()
+    if resumed and isinstance(resumed.get("urls"), list):
+        chosen_urls = [str(url) for url in resumed["urls"]]
+    else:
+        urls = [str(res.url) for res in linkup_results]
+        estimates = await asyncio.to_thread(page_stats.estimate, urls) if settings.page_yield_ranking_enabled else None
+        chosen_urls = browser_use.choose_urls(
+            urls,
+            policy.preferred_paths,
+            policy.max_pages_per_domain,
+            estimates,
+            policy.min_usefulness_threshold,
+            settings.page_yield_explore_rate,
+        )
+        chosen_urls = chosen_urls[:MAX_BROWSER_SLOTS]
+    reusable = {browser_use.normalize_url(str(page.url)): page for page in reuse_pages or []}
+    reused = {
+        slot: reusable[browser_use.normalize_url(url)]
+        for slot, url in enumerate(chosen_urls)
+        if browser_use.normalize_url(url) in reusable
+    }
+
+    # Browser sessions are bounded per worker process across all runs (capacity) and per domain
+    # within the run (politeness); gather keeps results in slot order regardless of completion order.
+    global_limit = _browse_limit()
+    domain_limits: Dict[str, asyncio.Semaphore] = {}
+    for url in chosen_urls:
+        domain_limits.setdefault(_domain_of(url), asyncio.Semaphore(max(policy.max_concurrent_per_domain, 1)))
+
+    score_inline = not settings.batch_scoring_enabled
+    progress = _BrowseProgress(chosen_urls, reused)
+
+    async def browse(slot: int, url: str) -> Tuple[PageExtraction, AgentWindowState]:
+        if slot in progress.pages:
+            page = progress.pages[slot]
+            action = "Reused from previous snapshot" if slot in progress.reused else "Restored from previous attempt"
+            return page, _restore_slot(run_id, slot, url, page, slot in progress.scored, action)
+        page, state = await _browse_slot(
+            slot, url, company, run_id, global_limit, domain_limits[_domain_of(url)], score_inline
+        )
+        progress.record(slot, page, scored=score_inline)
+        return page, state
+
+    ticker = asyncio.ensure_future(progress.keep_alive(settings.browse_heartbeat_seconds))
+    try:
+        browsed = await asyncio.gather(*(browse(slot, url) for slot, url in enumerate(chosen_urls)))
+        pages = [page for page, _ in browsed]
+        unscored = {slot: page for slot, page in enumerate(pages) if slot not in progress.scored}
+        if not score_inline and unscored:
+            scores = await _score_usefulness_batch(unscored, company.persona)
+            for slot, score in scores.items():
+                pages[slot].usefulness_score = score
+                _mark_slot_done(run_id, browsed[slot][1], score)
+            progress.scored.update(scores)
+            progress.heartbeat()
+    finally:
+        ticker.cancel()
+    finish_run(run_id)
+    return pages
 
 
 @activity.defn
@@ -125,18 +408,22 @@ async def build_snapshot_with_claude(
     policy: BrowsingPolicy,
     linkup_results: List[LinkupResult],
     page_extractions: List[PageExtraction],
+    run_id: Optional[str] = None,
 ) -> CompanySnapshot:
     schema = {
         "type": "object",
         "properties": {"brief_md": {"type": "string"}, "outreach_message": {"type": "string"}},
         "required": ["brief_md", "outreach_message"],
     }
+    context = pack_snapshot_context(linkup_results, page_extractions, settings.snapshot_context_token_budget)
+    context.log(f"snapshot ({company.name})")
     prompt = f"""Build a concise research brief and outreach message for {company.name}.
-Linkup results: { [r.model_dump() for r in linkup_results] }
-Pages: { [p.model_dump() for p in page_extractions] }"""
-    claude_output = await anthropic_client.claude_json_call(
-        "You are an SDR research assistant. Return JSON.", prompt, schema
-    )
+{context.text}"""
+    system_prompt = "You are an SDR research assistant. Return JSON."
+    if run_id and settings.stream_briefs:
+        claude_output = await _stream_brief(run_id, system_prompt, prompt, schema)
+    else:
+        claude_output = await anthropic_client.claude_json_call(system_prompt, prompt, schema)
     snapshot = CompanySnapshot(
         snapshot_id=str(uuid.uuid4()),
         company=company,
@@ -150,21 +437,43 @@ Pages: { [p.model_dump() for p in page_extractions] }"""
         ),
         freepik_asset_url=None,
     )
+    if run_id:
+        update_brief_draft(run_id, snapshot.brief_md, snapshot.outreach_message, done=True)
     return snapshot
 
 
+async def _stream_brief(run_id: str, system_prompt: str, prompt: str, schema: Dict) -> Dict:
+    last_flush = 0.0
+
+    def on_text(text: str) -> None:
+        nonlocal last_flush
+        now = time.monotonic()
+        if now - last_flush < settings.brief_stream_flush_seconds:
+            return
+        last_flush = now
+        fields = anthropic_client.extract_partial_fields(text, ("brief_md", "outreach_message"))
+        try:
+            update_brief_draft(run_id, fields.get("brief_md", ""), fields.get("outreach_message", ""))
+        except OSError as exc:
+            logger.warning("Failed to write brief draft for %s: %s", run_id, exc)
+
+    return await anthropic_client.claude_json_stream(system_prompt, prompt, schema, on_text)
+
+
 @activity.defn
-async def attach_freepik_visual(snapshot: CompanySnapshot) -> CompanySnapshot:
-    asset = await freepik.fetch_visual_asset(query=snapshot.company.name)
-    snapshot.freepik_asset_url = asset
-    return snapshot
+async def fetch_freepik_visual(company_name: str) -> Optional[str]:
+    return await freepik.fetch_visual_asset(query=company_name)
 
 
 @activity.defn
 async def write_snapshot_to_memory(snapshot: CompanySnapshot) -> str:
     path = f"{snapshot.company.name}/snapshots/{snapshot.snapshot_id}.json"
-    await smartbuckets.store_json(path, snapshot.model_dump())
-    storage.write_json(f"snapshots/{snapshot.snapshot_id}.json", snapshot.model_dump())
+    payload = snapshot.model_dump(mode="json")
+    await asyncio.gather(
+        persistence.upload_json(path, payload),
+        persistence.write_json(f"snapshots/{snapshot.snapshot_id}.json", payload),
+    )
+    await asyncio.to_thread(page_stats.record_snapshot, snapshot)
     return snapshot.snapshot_id
 
 
@@ -172,6 +481,9 @@ async def write_snapshot_to_memory(snapshot: CompanySnapshot) -> str:
 async def log_run_metrics(snapshot: CompanySnapshot) -> None:
     threshold = 0.5
     useful_pages = [p for p in snapshot.pages if p.usefulness_score >= threshold]
+    tool_failures = {provider: 0 for provider in http_pool.PROVIDERS}
+    info = activity.info()
+    tool_failures.update(tool_failure_counts(info.workflow_id, info.workflow_run_id))
     metrics = RunMetrics(
         snapshot_id=snapshot.snapshot_id,
         policy_version=snapshot.policy_version,
@@ -182,23 +494,17 @@ async def log_run_metrics(snapshot: CompanySnapshot) -> None:
         avg_usefulness=(
             sum(p.usefulness_score for p in snapshot.pages) / max(len(snapshot.pages), 1)
         ),
-        tool_failures={"linkup": 0, "browser_use": 0, "freepik": 0},
+        tool_failures=tool_failures,
+        created_at=snapshot.created_at,
     )
     path = f"metrics/{snapshot.snapshot_id}.json"
-    await smartbuckets.store_json(path, metrics.model_dump())
-    storage.write_json(path, metrics.model_dump())
+    payload = metrics.model_dump(mode="json")
+    await asyncio.gather(persistence.upload_json(path, payload), persistence.write_json(path, payload))
 
 
 @activity.defn
 async def fetch_recent_metrics_from_memory() -> List[RunMetrics]:
-    raw_metrics = await smartbuckets.fetch_recent_metrics(limit=20)
-    parsed = []
-    for m in raw_metrics:
-        try:
-            parsed.append(RunMetrics(**m))
-        except Exception as exc:
-            logger.debug("Skipping malformed metrics: %s", exc)
-    return parsed
+    return [m async for m in smartbuckets.stream_recent_metrics(limit=settings.self_learning_metrics_limit)]
 
 
 @activity.defn
@@ -224,10 +530,12 @@ async def propose_new_policy_with_claude(
             "min_usefulness_threshold",
         ],
     }
+    context = pack_metrics_context(metrics, settings.policy_context_token_budget)
+    context.log("policy")
     prompt = (
         "Given the current policy and metrics, propose a new policy tuned for better useful page rate.\n"
         f"Current policy: {current_policy.model_dump_json()}\n"
-        f"Metrics: {[m.model_dump() for m in metrics]}"
+        f"{context.text}"
     )
     output = await anthropic_client.claude_json_call(
         "You adjust crawling policy for SDR research.", prompt, schema
@@ -241,6 +549,7 @@ async def propose_new_policy_with_claude(
             allowed_domains=current_policy.allowed_domains,
             preferred_paths=output.get("preferred_paths", current_policy.preferred_paths),
             max_pages_per_domain=output.get("max_pages_per_domain", current_policy.max_pages_per_domain),
+            max_concurrent_per_domain=current_policy.max_concurrent_per_domain,
             min_usefulness_threshold=output.get("min_usefulness_threshold", current_policy.min_usefulness_threshold),
         )
     except Exception as exc:
@@ -252,9 +561,13 @@ async def propose_new_policy_with_claude(
 async def save_new_policy(policy: BrowsingPolicy) -> str:
     timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
     path = f"config/browsing_policy_{timestamp}.json"
-    await smartbuckets.store_json(path, policy.model_dump())
+    payload = policy.model_dump(mode="json")
     latest_alias = "config/browsing_policy_latest.json"
-    await smartbuckets.store_json(latest_alias, policy.model_dump())
-    storage.write_json(f"policy/{timestamp}.json", policy.model_dump())
-    storage.write_json("policy/latest.json", policy.model_dump())
+    await asyncio.gather(
+        persistence.upload_json(path, payload),
+        persistence.upload_json(latest_alias, payload),
+        persistence.write_json(f"policy/{timestamp}.json", payload),
+        persistence.write_json("policy/latest.json", payload),
+    )
+    policy_cache.mark_updated(policy)
     return policy.version
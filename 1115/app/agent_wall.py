@@ -1,8 +1,8 @@
 import json
 import os
-from datetime import datetime
+from collections import OrderedDict
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional
 
 from app.models import AgentWindowState
 
@@ -13,29 +13,130 @@ if not DATA_ROOT.exists():
 RUNS_DIR = DATA_ROOT / "runs"
 RUNS_DIR.mkdir(parents=True, exist_ok=True)
 
+MAX_CACHED_VIEWS = 256
+
 
 def _windows_path(run_id: str) -> Path:
     return RUNS_DIR / run_id / "windows.json"
 
 
+def _events_path(run_id: str) -> Path:
+    return RUNS_DIR / run_id / "events.jsonl"
+
+
+def _append_event(run_id: str, event: Dict) -> None:
+    path = _events_path(run_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = (json.dumps(event, default=str) + "\n").encode("utf-8")
+    # A single O_APPEND write per event keeps lines whole across concurrent writers.
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
 def update_window_state(run_id: str, window: AgentWindowState) -> None:
-    run_dir = RUNS_DIR / run_id
-    run_dir.mkdir(parents=True, exist_ok=True)
-    path = _windows_path(run_id)
-    current: List[AgentWindowState] = []
-    if path.exists():
+    _append_event(run_id, {"event": "window", "data": window.model_dump(mode="json")})
+
+
+def finish_run(run_id: str) -> None:
+    _append_event(run_id, {"event": "end"})
+
+
+def record_tool_failure(run_id: str, provider: str, kind: str, execution_id: Optional[str] = None) -> None:
+    _append_event(run_id, {"event": "tool_failure", "provider": provider, "kind": kind, "execution_id": execution_id})
+
+
+def tool_failure_counts(run_id: str, execution_id: Optional[str] = None) -> Dict[str, int]:
+    """Failures logged for ``run_id``; with ``execution_id``, only those of that Temporal run."""
+    counts: Dict[str, int] = {}
+    try:
+        with _events_path(run_id).open("rb") as handle:
+            for line in handle:
+                if b'"tool_failure"' not in line:
+                    continue
+                try:
+                    event = json.loads(line)
+                    provider = event["provider"]
+                except Exception:
+                    continue
+                if execution_id and event.get("execution_id") != execution_id:
+                    continue
+                counts[provider] = counts.get(provider, 0) + 1
+    except FileNotFoundError:
+        pass
+    return counts
+
+
+def _brief_path(run_id: str) -> Path:
+    return RUNS_DIR / run_id / "brief.json"
+
+
+def update_brief_draft(run_id: str, brief_md: str, outreach_message: str, done: bool = False) -> None:
+    path = _brief_path(run_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".brief.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"brief_md": brief_md, "outreach_message": outreach_message, "done": done}))
+    os.replace(tmp, path)
+
+
+def read_brief_draft(run_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(_brief_path(run_id).read_text())
+    except Exception:
+        return None
+
+
+class RunView:
+    """Latest window per slot, folded incrementally from a run's event log."""
+
+    def __init__(self, run_id: str) -> None:
+        self.run_id = run_id
+        self.offset = 0
+        self.windows: Dict[int, AgentWindowState] = {}
+        self.finished = False
+
+    def refresh(self) -> "RunView":
+        path = _events_path(self.run_id)
         try:
-            raw = json.loads(path.read_text())
-            current = [AgentWindowState(**w) for w in raw]
-        except Exception:
-            current = []
-    filtered = [w for w in current if w.slot != window.slot]
-    filtered.append(window)
-    filtered.sort(key=lambda w: w.slot)
-    path.write_text(json.dumps([w.model_dump() for w in filtered], default=str, indent=2))
+            with path.open("rb") as handle:
+                handle.seek(self.offset)
+                chunk = handle.read()
+        except FileNotFoundError:
+            return self
+        # Only consume complete lines; a trailing partial line is re-read next time.
+        complete = chunk[: chunk.rfind(b"\n") + 1]
+        self.offset += len(complete)
+        for line in complete.splitlines():
+            try:
+                event = json.loads(line)
+                if event.get("event") == "end":
+                    self.finished = True
+                elif event.get("event") == "window":
+                    window = AgentWindowState(**event["data"])
+                    self.windows[window.slot] = window
+                    self.finished = False
+            except Exception:
+                continue
+        return self
 
 
-def list_window_states(run_id: str) -> List[AgentWindowState]:
+_views: "OrderedDict[str, RunView]" = OrderedDict()
+
+
+def get_run_view(run_id: str) -> RunView:
+    view = _views.get(run_id)
+    if view is None:
+        view = RunView(run_id)
+        _views[run_id] = view
+        while len(_views) > MAX_CACHED_VIEWS:
+            _views.popitem(last=False)
+    _views.move_to_end(run_id)
+    return view.refresh()
+
+
+def _legacy_window_states(run_id: str) -> List[AgentWindowState]:
     path = _windows_path(run_id)
     if not path.exists():
         return []
@@ -44,3 +145,10 @@ def list_window_states(run_id: str) -> List[AgentWindowState]:
         return [AgentWindowState(**w) for w in raw]
     except Exception:
         return []
+
+
+def list_window_states(run_id: str) -> List[AgentWindowState]:
+    if not _events_path(run_id).exists():
+        return _legacy_window_states(run_id)
+    view = get_run_view(run_id)
+    return [view.windows[slot] for slot in sorted(view.windows)]
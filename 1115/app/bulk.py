@@ -0,0 +1,104 @@
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from app.models import CompanyInput
+
+MAX_REJECTED_REPORTED = 100
+
+
+def normalize_domain(domain: Optional[str]) -> Optional[str]:
+    if not domain:
+        return None
+    host = domain.strip().lower()
+    for scheme in ("https://", "http://"):
+        if host.startswith(scheme):
+            host = host[len(scheme) :]
+    host = host.split("/", 1)[0]
+    if host.startswith("www."):
+        host = host[4:]
+    return host or None
+
+
+def dedup_key(company: CompanyInput) -> str:
+    domain = normalize_domain(company.domain)
+    if domain:
+        return f"domain:{domain}"
+    return "name:" + " ".join(company.name.lower().split())
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+async def iter_rows(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, Optional[Dict], str]]:
+    """Yield ``(line_number, row, error)`` from JSONL or CSV (header first, one record per line)."""
+    header: Optional[List[str]] = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [h.strip().lower() for h in values]
+                continue
+            yield line_number, {k: v.strip() for k, v in zip(header, values) if v.strip()}, ""
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, row, ""
+
+
+class BulkIngestResult:
+    def __init__(self) -> None:
+        self.companies: List[CompanyInput] = []
+        self.duplicates = 0
+        self.rejected: List[Dict] = []
+        self.rejected_count = 0
+
+    def reject(self, line_number: int, reason: str) -> None:
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REJECTED_REPORTED:
+            self.rejected.append({"line": line_number, "error": reason})
+
+
+async def ingest_companies(chunks: AsyncIterator[bytes], fmt: str, max_companies: int) -> BulkIngestResult:
+    result = BulkIngestResult()
+    seen: Set[str] = set()
+    async for line_number, row, error in iter_rows(iter_lines(chunks), fmt):
+        if row is None:
+            result.reject(line_number, error)
+            continue
+        try:
+            company = CompanyInput(**row)
+        except ValidationError as exc:
+            result.reject(
+                line_number, "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+            )
+            continue
+        key = dedup_key(company)
+        if key in seen:
+            result.duplicates += 1
+            continue
+        seen.add(key)
+        result.companies.append(company)
+        if len(result.companies) > max_companies:
+            raise ValueError(f"Bulk request exceeds {max_companies} companies")
+    return result
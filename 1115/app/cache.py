@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.storage import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = DATA_DIR / "cache"
+
+# A hit only rewrites last_access when it is older than this, and hit/miss counters are written in
+# batches, so a cache read is normally a pure read that never takes the SQLite write lock.
+TOUCH_INTERVAL_SECONDS = 60.0
+COUNTER_FLUSH_SECONDS = 5.0
+
+_registry: Dict[str, "DiskCache"] = {}
+_memory_registry: Dict[str, "MemoryTTLCache"] = {}
+
+
+def make_key(*parts: Any) -> str:
+    encoded = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """SQLite-backed TTL cache with size-bounded LRU eviction, shared by every process on the host."""
+
+    def __init__(self, name: str, max_bytes: int, default_ttl_seconds: float) -> None:
+        self.name = name
+        self.max_bytes = max_bytes
+        self.default_ttl_seconds = default_ttl_seconds
+        self.path = CACHE_DIR / f"{name}.sqlite3"
+        self._initialized = False
+        self._lock = threading.Lock()
+        self._pending_counts: Dict[str, int] = {}
+        self._pending_touches: Dict[str, float] = {}
+        self._flushed_at = time.monotonic()
+        _registry[name] = self
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, counter: str, amount: int = 1) -> None:
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (counter, amount),
+        )
+
+    def _note(self, counter: str, touch_key: Optional[str] = None, now: float = 0.0) -> None:
+        with self._lock:
+            self._pending_counts[counter] = self._pending_counts.get(counter, 0) + 1
+            if touch_key is not None:
+                self._pending_touches[touch_key] = now
+
+    def _flush(self, conn: sqlite3.Connection) -> None:
+        """Write batched counters and LRU touches in one transaction."""
+        with self._lock:
+            counts, touches = self._pending_counts, self._pending_touches
+            self._pending_counts, self._pending_touches = {}, {}
+            self._flushed_at = time.monotonic()
+        if not counts and not touches:
+            return
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+                [(accessed, key) for key, accessed in touches.items()],
+            )
+            for counter, amount in counts.items():
+                self._bump(conn, counter, amount)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(
+        self,
+        key: str,
+        max_age_seconds: Optional[float] = None,
+        max_age_for: Optional[Callable[[Any], float]] = None,
+    ) -> Optional[Any]:
+        """Return a fresh value or None; ``max_age_for`` derives the freshness window from the value itself.
+
+        Blocking: async callers run it in a thread."""
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT value, created_at, expires_at, last_access FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                value = json.loads(row[0]) if row is not None else None
+                if row is not None and max_age_for is not None:
+                    max_age_seconds = max_age_for(value)
+                stale = row is not None and (
+                    row[2] <= now or (max_age_seconds is not None and now - row[1] > max_age_seconds)
+                )
+                if row is None or stale:
+                    self._note("misses")
+                    if stale:
+                        self._note("expired")
+                    value = None
+                else:
+                    self._note("hits", key if now - row[3] >= TOUCH_INTERVAL_SECONDS else None, now)
+                if time.monotonic() - self._flushed_at >= COUNTER_FLUSH_SECONDS:
+                    self._flush(conn)
+                return value
+            finally:
+                conn.close()
+        except Exception as exc:
+            logger.warning("Cache '%s' read failed: %s", self.name, exc)
+            return None
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Blocking, like ``get``."""
+        now = time.time()
+        ttl = self.default_ttl_seconds if ttl_seconds is None else ttl_seconds
+        encoded = json.dumps(value, default=str)
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, created_at, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, encoded, len(encoded), now, now + ttl, now),
+                )
+                self._flush(conn)
+                self._evict(conn, now)
+            finally:
+                conn.close()
+        except Exception as exc:
+            logger.warning("Cache '%s' write failed: %s", self.name, exc)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self._bump(conn, "evictions", evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            conn = self._connect()
+            try:
+                self._flush(conn)
+                counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+                entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            finally:
+                conn.close()
+        except Exception as exc:
+            logger.warning("Cache '%s' stats failed: %s", self.name, exc)
+            return {"error": str(exc)}
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "expired": counters.get("expired", 0),
+            "evictions": counters.get("evictions", 0),
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+def all_cache_stats(include_shared: bool = True) -> Dict[str, Dict[str, Any]]:
+    """Stats for every named cache; ``include_shared=False`` leaves out the disk caches, whose
+    counters are shared by every process on the host."""
+    stats = {name: cache.stats() for name, cache in _registry.items()} if include_shared else {}
+    stats.update((name, cache.stats()) for name, cache in _memory_registry.items())
+    return dict(sorted(stats.items()))
+
+
+class MemoryTTLCache:
+    """Small in-process TTL cache for hot, short-lived values; named caches report hit/miss stats."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024, name: Optional[str] = None) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if name:
+            _memory_registry[name] = self
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "in_process": True,
+        }
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key onto one in-flight task."""
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        # Shielded so one cancelled caller does not cancel the call for everyone sharing it.
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved; waiters re-raise it themselves
@@ -0,0 +1,55 @@
+import argparse
+import logging
+
+from app import page_stats, storage
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rebuild_index(args: argparse.Namespace) -> None:
+    count = storage.rebuild_index()
+    logger.info("Indexed %s documents from %s", count, storage.DATA_DIR)
+
+
+def migrate_storage(args: argparse.Namespace) -> None:
+    count = storage.migrate_documents(args.format, args.prefix or None)
+    logger.info("Rewrote %s documents as %s", count, storage.resolve_format(args.format))
+    storage.rebuild_index()
+
+
+def backfill_page_stats(args: argparse.Namespace) -> None:
+    snapshots, pages = page_stats.backfill(rebuild=args.rebuild)
+    logger.info("Folded %s new pages from %s snapshots into %s", pages, snapshots, page_stats.STATS_PATH)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser(
+        "rebuild-index", help="Rebuild the storage metadata index from existing snapshot/metrics/policy files"
+    )
+    rebuild.set_defaults(func=rebuild_index)
+
+    migrate = commands.add_parser("migrate-storage", help="Rewrite stored documents in another storage format")
+    migrate.add_argument(
+        "--format", choices=storage.STORAGE_FORMATS, default=None, help="Target format (default: STORAGE_FORMAT)"
+    )
+    migrate.add_argument(
+        "--prefix", action="append", help="Limit to a prefix such as snapshots (repeatable; default: all)"
+    )
+    migrate.set_defaults(func=migrate_storage)
+
+    backfill = commands.add_parser(
+        "backfill-page-stats", help="Fold stored snapshots into the page-yield index used for URL selection"
+    )
+    backfill.add_argument("--rebuild", action="store_true", help="Clear the index before backfilling")
+    backfill.set_defaults(func=backfill_page_stats)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
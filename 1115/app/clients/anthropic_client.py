@@ -1,9 +1,11 @@
+import asyncio
 import json
 import logging
-from typing import Any, Dict
-
-import httpx
+import re
+from typing import Any, Callable, Dict, Iterable
 
+from app.cache import DiskCache, make_key
+from app.clients import http_pool
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -11,34 +13,150 @@ logger = logging.getLogger(__name__)
 
 ANTHROPIC_MODEL = "claude-3-5-sonnet-latest"
 
+response_cache = DiskCache(
+    "claude_json", max_bytes=settings.llm_cache_max_bytes, default_ttl_seconds=settings.llm_cache_ttl_seconds
+)
 
-async def claude_json_call(system_prompt: str, user_prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
-    if not settings.anthropic_api_key:
-        logger.warning("ANTHROPIC_API_KEY missing; returning empty JSON for prompt")
-        return {}
 
-    headers = {
+def estimate_tokens(text: str) -> int:
+    # Rough heuristic (~4 characters per token); good enough for budgeting prompts.
+    return len(text) // 4 + 1
+
+
+def _messages_url() -> str:
+    return f"{settings.anthropic_base_url.rstrip('/')}/v1/messages"
+
+
+def _headers() -> Dict[str, str]:
+    return {
         "x-api-key": settings.anthropic_api_key,
         "anthropic-version": "2023-06-01",
         "content-type": "application/json",
     }
-    payload = {
+
+
+def _payload(system_prompt: str, user_prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {
         "model": ANTHROPIC_MODEL,
         "max_tokens": 1024,
         "system": system_prompt,
         "messages": [{"role": "user", "content": user_prompt}],
         "extra_body": {"response_format": {"type": "json_object", "schema": schema}},
     }
+
+
+async def claude_json_call(
+    system_prompt: str, user_prompt: str, schema: Dict[str, Any], use_cache: bool = True
+) -> Dict[str, Any]:
+    if not settings.anthropic_api_key:
+        logger.warning("ANTHROPIC_API_KEY missing; returning empty JSON for prompt")
+        return {}
+
+    use_cache = use_cache and settings.llm_cache_enabled
+    cache_key = make_key(ANTHROPIC_MODEL, system_prompt, user_prompt, schema)
+    if use_cache:
+        cached = await asyncio.to_thread(response_cache.get, cache_key)
+        if cached is not None:
+            return cached
+
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post("https://api.anthropic.com/v1/messages", headers=headers, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await http_pool.request(
+            "anthropic", "POST", _messages_url(), headers=_headers(), json=_payload(system_prompt, user_prompt, schema)
+        )
+        resp.raise_for_status()
+        data = resp.json()
     except Exception as exc:
         logger.error("Anthropic call failed: %s", exc)
         return {}
 
     try:
-        return json.loads(data["content"][0]["text"])
+        result = json.loads(data["content"][0]["text"])
     except Exception:
         return {}
+    if use_cache and result:
+        await asyncio.to_thread(response_cache.set, cache_key, result)
+    return result
+
+
+async def claude_json_stream(
+    system_prompt: str,
+    user_prompt: str,
+    schema: Dict[str, Any],
+    on_text: Callable[[str], None],
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """Like ``claude_json_call`` but consumes the Messages streaming API, calling ``on_text``
+    with the accumulated response text after every delta."""
+    if not settings.anthropic_api_key:
+        logger.warning("ANTHROPIC_API_KEY missing; returning empty JSON for prompt")
+        return {}
+
+    use_cache = use_cache and settings.llm_cache_enabled
+    cache_key = make_key(ANTHROPIC_MODEL, system_prompt, user_prompt, schema)
+    if use_cache:
+        cached = await asyncio.to_thread(response_cache.get, cache_key)
+        if cached is not None:
+            on_text(json.dumps(cached))
+            return cached
+
+    payload = {**_payload(system_prompt, user_prompt, schema), "stream": True}
+    text = ""
+    try:
+        async with http_pool.stream("anthropic", "POST", _messages_url(), headers=_headers(), json=payload) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                try:
+                    event = json.loads(line[len("data:") :])
+                except ValueError:
+                    continue
+                delta = event.get("delta") or {}
+                if event.get("type") == "content_block_delta" and delta.get("type") == "text_delta":
+                    text += delta.get("text", "")
+                    on_text(text)
+    except Exception as exc:
+        logger.error("Anthropic streaming call failed: %s", exc)
+        if not text:
+            return {}
+
+    try:
+        result = json.loads(text)
+    except Exception:
+        # Interrupted stream: keep whatever string fields were already complete enough to show.
+        return extract_partial_fields(text, _schema_string_fields(schema))
+    if use_cache and result:
+        await asyncio.to_thread(response_cache.set, cache_key, result)
+    return result
+
+
+def _schema_string_fields(schema: Dict[str, Any]) -> Iterable[str]:
+    return [k for k, v in (schema.get("properties") or {}).items() if v.get("type") == "string"]
+
+
+_UNICODE_TAIL = re.compile(r"\\u[0-9a-fA-F]{0,3}$")
+
+
+def extract_partial_fields(text: str, keys: Iterable[str]) -> Dict[str, str]:
+    """Best-effort decode of top-level string fields from a possibly truncated JSON object."""
+    fields: Dict[str, str] = {}
+    for key in keys:
+        match = re.search(r'"%s"\s*:\s*"' % re.escape(key), text)
+        if not match:
+            continue
+        raw, i, escaped = [], match.end(), False
+        while i < len(text):
+            char = text[i]
+            if char == '"' and not escaped:
+                break
+            escaped = char == "\\" and not escaped
+            raw.append(char)
+            i += 1
+        segment = "".join(raw)
+        # Drop an escape sequence cut off mid-stream (a trailing "\" or "\u00").
+        segment = segment[:-1] if escaped else _UNICODE_TAIL.sub("", segment)
+        try:
+            fields[key] = json.loads(f'"{segment}"')
+        except ValueError:
+            continue
+    return fields
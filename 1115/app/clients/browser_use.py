@@ -1,18 +1,71 @@
+import asyncio
 import logging
-from typing import Dict, List
-
-import httpx
+import random
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
+from app.cache import DiskCache, make_key
+from app.clients import http_pool
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+extraction_cache = DiskCache(
+    "browser_use_extractions",
+    max_bytes=settings.extraction_cache_max_bytes,
+    default_ttl_seconds=max(
+        [settings.extraction_cache_default_max_age_seconds, *settings.extraction_cache_max_age_by_page_type.values()]
+    ),
+)
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")))
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def _extraction_cache_key(url: str, company_name: str) -> str:
+    return make_key("browser_use", normalize_url(url), company_name.strip().lower())
+
+
+def _max_age_for(raw: Dict) -> float:
+    page_type = str(raw.get("page_type") or "unknown").lower()
+    return settings.extraction_cache_max_age_by_page_type.get(
+        page_type, settings.extraction_cache_default_max_age_seconds
+    )
+
+
+def cached_extraction(url: str, company_name: str) -> Optional[Dict]:
+    if not settings.extraction_cache_enabled:
+        return None
+    return extraction_cache.get(_extraction_cache_key(url, company_name), max_age_for=_max_age_for)
+
+
+def failed_extraction(reason: str) -> Dict:
+    return {
+        "page_type": "error",
+        "icp": None,
+        "product_lines": [],
+        "pain_points": [],
+        "signals": [],
+        "raw_text_excerpt": reason,
+    }
+
 
 async def extract_page(url: str, company_name: str) -> Dict:
     """
     Minimal Browser Use API wrapper.
 
     If no API key is set, returns a stub extraction to keep workflows moving.
+    Successful extractions are stored in the URL-level extraction cache; callers
+    check ``cached_extraction`` first to skip the remote browse.
     """
     if not settings.browser_use_api_key:
         logger.warning("BROWSER_USE_API_KEY missing; returning stubbed extraction for %s", url)
@@ -33,32 +86,58 @@ async def extract_page(url: str, company_name: str) -> Dict:
     endpoint = f"{settings.browser_use_base_url.rstrip('/')}/v1/browse"
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.post(endpoint, json=payload, headers=headers)
-            resp.raise_for_status()
-            return resp.json()
+        resp = await http_pool.request("browser_use", "POST", endpoint, json=payload, headers=headers)
+        resp.raise_for_status()
+        raw = resp.json()
     except Exception as exc:
         logger.error("Browser Use extraction failed for %s: %s", url, exc)
-        return {
-            "page_type": "error",
-            "icp": None,
-            "product_lines": [],
-            "pain_points": [],
-            "signals": [],
-            "raw_text_excerpt": f"Browser Use call failed: {exc}",
-        }
+        return failed_extraction(f"Browser Use call failed: {exc}")
+
+    if settings.extraction_cache_enabled and isinstance(raw, dict) and raw.get("page_type") != "error":
+        await asyncio.to_thread(extraction_cache.set, _extraction_cache_key(url, company_name), raw)
+    return raw
+
 
+def choose_urls(
+    linkup_urls: List[str],
+    preferred_paths: List[str],
+    max_urls: int,
+    estimates: Optional[Dict[str, Any]] = None,
+    min_usefulness: float = 0.0,
+    explore_rate: float = 0.0,
+) -> List[str]:
+    """Pick up to ``max_urls`` candidates.
 
-def choose_urls(linkup_urls: List[str], preferred_paths: List[str], max_urls: int) -> List[str]:
+    Without history, URLs matching ``preferred_paths`` go first, then the rest in Linkup order.
+    With ``estimates`` (``page_stats.estimate``), candidates are ranked by expected usefulness per
+    browse-second, preferred paths breaking ties, and URLs whose well-observed expected usefulness
+    falls below ``min_usefulness`` are dropped (the best candidate is always kept). With probability
+    ``explore_rate`` one dropped URL is browsed anyway, taking the last slot if none is free, so a
+    path whose pages improve can earn its way back.
+    """
+    preferred = [any(path in candidate for path in preferred_paths) for candidate in linkup_urls]
+    order = sorted(range(len(linkup_urls)), key=lambda i: not preferred[i])
+    explore: Optional[int] = None
+    if estimates:
+        order.sort(key=lambda i: -estimates[linkup_urls[i]].yield_per_second if linkup_urls[i] in estimates else 0.0)
+        kept = [
+            i
+            for i in order
+            if linkup_urls[i] not in estimates
+            or estimates[linkup_urls[i]].observations < settings.page_yield_min_observations
+            or estimates[linkup_urls[i]].usefulness >= min_usefulness
+        ] or order[:1]
+        kept_urls = {linkup_urls[i] for i in kept}
+        dropped = [i for i in order if linkup_urls[i] not in kept_urls]
+        if dropped and random.random() < explore_rate:
+            explore = random.choice(dropped)
+        order = kept
     chosen: List[str] = []
-    for candidate in linkup_urls:
-        if len(chosen) >= max_urls:
-            break
-        if any(path in candidate for path in preferred_paths):
-            chosen.append(candidate)
-    for candidate in linkup_urls:
+    for i in order:
         if len(chosen) >= max_urls:
             break
-        if candidate not in chosen:
-            chosen.append(candidate)
+        if linkup_urls[i] not in chosen:
+            chosen.append(linkup_urls[i])
+    if explore is not None and max_urls > 0:
+        chosen = chosen[: max_urls - 1] + [linkup_urls[explore]]
     return chosen
@@ -1,8 +1,7 @@
 import logging
 from typing import Optional
 
-import httpx
-
+from app.clients import http_pool
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -18,10 +17,9 @@ async def fetch_visual_asset(query: str) -> Optional[str]:
     endpoint = settings.freepic_base_url
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(endpoint, headers=headers, params=params)
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await http_pool.request("freepik", "GET", endpoint, headers=headers, params=params)
+        resp.raise_for_status()
+        data = resp.json()
     except Exception as exc:
         logger.error("Freepik search failed: %s", exc)
         return None
@@ -0,0 +1,117 @@
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+import httpx
+
+from app import telemetry
+from app.clients import rate_limit
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("linkup", "browser_use", "anthropic", "freepik", "smartbuckets")
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _timeout_for(provider: str) -> httpx.Timeout:
+    total = getattr(settings, f"{provider}_timeout_seconds")
+    return httpx.Timeout(total, connect=min(settings.http_connect_timeout_seconds, total))
+
+
+def _http2_available() -> bool:
+    if not settings.http2_enabled:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP2_ENABLED set but the 'h2' package is missing; falling back to HTTP/1.1")
+        return False
+    return True
+
+
+def _build_client(provider: str) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry_seconds,
+    )
+    return httpx.AsyncClient(timeout=_timeout_for(provider), limits=limits, http2=_http2_available())
+
+
+def get_client(provider: str) -> httpx.AsyncClient:
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown provider '{provider}'")
+    client = _clients.get(provider)
+    if client is None or client.is_closed:
+        # Created lazily so activities invoked outside the app/worker lifecycle still work.
+        client = _build_client(provider)
+        _clients[provider] = client
+    return client
+
+
+async def _acquire(provider: str) -> None:
+    try:
+        await rate_limit.acquire(provider)
+    except rate_limit.RateLimitTimeout:
+        telemetry.record_failure(provider, "rate_limit_timeout")
+        raise
+
+
+async def _record(provider: str, resp: httpx.Response, attempt: int) -> bool:
+    """Feed the response to the limiter and metrics; True when it should be returned to the caller."""
+    await rate_limit.record_response(provider, resp.status_code, resp.headers.get("retry-after"))
+    final = resp.status_code != 429 or attempt >= settings.rate_limit_max_retries
+    telemetry.record_response(provider, resp.status_code, final)
+    return final
+
+
+async def request(provider: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+    """Send through the provider's pooled client, honouring the shared rate limit and retrying 429s."""
+    client = get_client(provider)
+    attempt = 0
+    while True:
+        await _acquire(provider)
+        with telemetry.provider_call(provider):
+            resp = await client.request(method, url, **kwargs)
+        if await _record(provider, resp, attempt):
+            return resp
+        attempt += 1
+        logger.info("%s returned 429; retry %s/%s", provider, attempt, settings.rate_limit_max_retries)
+
+
+@asynccontextmanager
+async def stream(provider: str, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+    """Streaming counterpart of ``request``; the body is read incrementally inside the context."""
+    client = get_client(provider)
+    attempt = 0
+    while True:
+        await _acquire(provider)
+        with telemetry.provider_call(provider):
+            response_cm = client.stream(method, url, **kwargs)
+            resp = await response_cm.__aenter__()
+        try:
+            if await _record(provider, resp, attempt):
+                yield resp
+                return
+        finally:
+            await response_cm.__aexit__(None, None, None)
+        attempt += 1
+        logger.info("%s returned 429; retry %s/%s", provider, attempt, settings.rate_limit_max_retries)
+
+
+async def open_clients() -> None:
+    for provider in PROVIDERS:
+        get_client(provider)
+    logger.info("Opened pooled HTTP clients for %s", ", ".join(PROVIDERS))
+
+
+async def close_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as exc:
+            logger.warning("Failed to close HTTP client: %s", exc)
@@ -1,31 +1,42 @@
 import logging
 from typing import List
 
-import httpx
-
+from app.cache import MemoryTTLCache, SingleFlight
+from app.clients import http_pool
 from app.config import settings
 from app.models import CompanyInput, LinkupResult
 
 logger = logging.getLogger(__name__)
 
+# Keyed on the rendered policy query: identical concurrent searches share one request,
+# and repeats within the TTL are served from memory.
+_search_cache = MemoryTTLCache(ttl_seconds=settings.linkup_cache_ttl_seconds, name="linkup_search")
+_search_flight = SingleFlight()
+
 
 async def search_company(company: CompanyInput, policy_query: str) -> List[LinkupResult]:
     if not settings.linkup_api_key:
         logger.warning("LINKUP_API_KEY missing; returning empty results.")
         return []
 
+    results = _search_cache.get(policy_query)
+    if results is None:
+        try:
+            results = await _search_flight.do(policy_query, lambda: _search(policy_query))
+        except Exception as exc:
+            logger.error("Linkup search failed: %s", exc)
+            return []
+    return [r.model_copy(deep=True) for r in results]
+
+
+async def _search(policy_query: str) -> List[LinkupResult]:
     params = {"q": policy_query, "limit": 10}
     headers = {"Authorization": f"Bearer {settings.linkup_api_key}"}
 
     url = f"{settings.linkup_base_url.rstrip('/')}/v1/search"
-    try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            resp = await client.get(url, params=params, headers=headers)
-            resp.raise_for_status()
-            payload = resp.json()
-    except Exception as exc:
-        logger.error("Linkup search failed: %s", exc)
-        return []
+    resp = await http_pool.request("linkup", "GET", url, params=params, headers=headers)
+    resp.raise_for_status()
+    payload = resp.json()
 
     results = []
     for item in payload.get("results", [])[: settings.worker_max_concurrency]:
@@ -41,4 +52,5 @@ async def search_company(company: CompanyInput, policy_query: str) -> List[Linku
         except Exception as exc:
             logger.debug("Skipping malformed result: %s", exc)
             continue
+    _search_cache.set(policy_query, results)
     return results
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+from app.config import settings
+from app.storage import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Token buckets live in SQLite so every worker process on the host draws from the same budget.
+# Transactions can wait on another process's lock, so they run in a thread, never on the event loop.
+LIMITER_PATH = DATA_DIR / "rate_limits.sqlite3"
+
+_initialized = False
+
+
+class RateLimitTimeout(Exception):
+    pass
+
+
+def _connect() -> sqlite3.Connection:
+    global _initialized
+    if not _initialized:
+        LIMITER_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(LIMITER_PATH, timeout=10.0, isolation_level=None)
+    if not _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "provider TEXT PRIMARY KEY, tokens REAL NOT NULL, rate REAL NOT NULL, "
+            "updated_at REAL NOT NULL, blocked_until REAL NOT NULL DEFAULT 0)"
+        )
+        _initialized = True
+    return conn
+
+
+def _max_rate(provider: str) -> float:
+    return max(settings.rate_limit_rps.get(provider, settings.rate_limit_default_rps), 0.01)
+
+
+def _burst(provider: str) -> float:
+    return max(_max_rate(provider), 1.0)
+
+
+def _load(conn: sqlite3.Connection, provider: str, now: float) -> Tuple[float, float, float]:
+    row = conn.execute(
+        "SELECT tokens, rate, updated_at, blocked_until FROM buckets WHERE provider = ?", (provider,)
+    ).fetchone()
+    if row is None:
+        return _burst(provider), _max_rate(provider), 0.0
+    tokens, rate, updated_at, blocked_until = row
+    rate = min(rate, _max_rate(provider))
+    tokens = min(_burst(provider), tokens + max(now - updated_at, 0.0) * rate)
+    return tokens, rate, blocked_until
+
+
+def _store(conn: sqlite3.Connection, provider: str, tokens: float, rate: float, now: float, blocked_until: float) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO buckets (provider, tokens, rate, updated_at, blocked_until) VALUES (?, ?, ?, ?, ?)",
+        (provider, tokens, rate, now, blocked_until),
+    )
+
+
+def _try_acquire(provider: str) -> float:
+    """Take one token if available; otherwise return how long to wait before trying again."""
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        tokens, rate, blocked_until = _load(conn, provider, now)
+        if now < blocked_until:
+            wait = blocked_until - now
+        elif tokens >= 1.0:
+            tokens -= 1.0
+            wait = 0.0
+        else:
+            wait = (1.0 - tokens) / rate
+        _store(conn, provider, tokens, rate, now, blocked_until)
+        conn.execute("COMMIT")
+        return wait
+    finally:
+        conn.close()
+
+
+async def acquire(provider: str) -> None:
+    if not settings.rate_limit_enabled:
+        return
+    deadline = time.monotonic() + settings.rate_limit_max_wait_seconds
+    while True:
+        try:
+            wait = await asyncio.to_thread(_try_acquire, provider)
+        except sqlite3.Error as exc:
+            logger.warning("Rate limiter unavailable for %s, proceeding unthrottled: %s", provider, exc)
+            return
+        if wait <= 0:
+            return
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise RateLimitTimeout(f"Timed out waiting for {provider} rate limit")
+        await asyncio.sleep(min(wait, remaining, 5.0))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+async def record_response(provider: str, status_code: int, retry_after: Optional[str] = None) -> None:
+    """Adapt the provider's rate: multiplicative decrease on 429, additive increase on success."""
+    if not settings.rate_limit_enabled or (status_code != 429 and status_code >= 400):
+        return
+    await asyncio.to_thread(_adapt_rate, provider, status_code, retry_after)
+
+
+def _adapt_rate(provider: str, status_code: int, retry_after: Optional[str]) -> None:
+    now = time.time()
+    max_rate = _max_rate(provider)
+    try:
+        conn = _connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            tokens, rate, blocked_until = _load(conn, provider, now)
+            if status_code == 429:
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = settings.rate_limit_default_backoff_seconds
+                blocked_until = max(blocked_until, now + delay)
+                rate = max(rate * settings.rate_limit_backoff_factor, max_rate * settings.rate_limit_min_fraction)
+                tokens = 0.0
+                logger.warning("%s rate limited; backing off %.1fs, rate now %.2f rps", provider, delay, rate)
+            else:
+                rate = min(max_rate, rate + max_rate * settings.rate_limit_recovery_fraction)
+            _store(conn, provider, tokens, rate, now, blocked_until)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+    except sqlite3.Error as exc:
+        logger.warning("Failed to record %s response in rate limiter: %s", provider, exc)
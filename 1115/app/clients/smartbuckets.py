@@ -1,27 +1,31 @@
-import json
+import asyncio
 import logging
-from typing import Dict, List, Optional
-
-import httpx
+from typing import AsyncIterator, Dict, List, Optional
 
+from app import storage
+from app.clients import http_pool
 from app.config import settings
+from app.models import RunMetrics
 
 logger = logging.getLogger(__name__)
 
 
+async def put_json(path: str, payload: Dict) -> None:
+    """Upload ``payload`` to ``path``, raising on failure so callers can retry."""
+    endpoint = f"{settings.smartbuckets_base_url.rstrip('/')}/upload"
+    body = {"bucket": settings.smartbucket_name, "path": path, "data": payload}
+    headers = {"Authorization": f"Bearer {settings.liquid_metal_api_key}", "Content-Type": "application/json"}
+    resp = await http_pool.request("smartbuckets", "POST", endpoint, json=body, headers=headers)
+    resp.raise_for_status()
+
+
 async def store_json(path: str, payload: Dict) -> Optional[str]:
     if not settings.liquid_metal_api_key:
         logger.warning("LIQUID_METAL_API_KEY missing; skipping SmartBuckets write.")
         return None
-
-    endpoint = f"{settings.smartbuckets_base_url.rstrip('/')}/upload"
-    body = {"bucket": settings.smartbucket_name, "path": path, "data": payload}
-    headers = {"Authorization": f"Bearer {settings.liquid_metal_api_key}", "Content-Type": "application/json"}
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post(endpoint, json=body, headers=headers)
-            resp.raise_for_status()
-            return path
+        await put_json(path, payload)
+        return path
     except Exception as exc:
         logger.error("SmartBuckets write failed: %s", exc)
         return None
@@ -34,10 +38,9 @@ async def fetch_latest_policy() -> Optional[Dict]:
     headers = {"Authorization": f"Bearer {settings.liquid_metal_api_key}"}
     params = {"bucket": settings.smartbucket_name, "prefix": "config/", "limit": 1}
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(endpoint, headers=headers, params=params)
-            resp.raise_for_status()
-            objects = resp.json().get("objects", [])
+        resp = await http_pool.request("smartbuckets", "GET", endpoint, headers=headers, params=params)
+        resp.raise_for_status()
+        objects = resp.json().get("objects", [])
     except Exception as exc:
         logger.error("SmartBuckets list failed: %s", exc)
         return None
@@ -50,46 +53,92 @@ async def fetch_latest_policy() -> Optional[Dict]:
         return None
     download_url = f"{settings.smartbuckets_base_url.rstrip('/')}/download"
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(
-                download_url, headers=headers, params={"bucket": settings.smartbucket_name, "path": latest_path}
-            )
-            resp.raise_for_status()
-            return resp.json()
+        resp = await http_pool.request(
+            "smartbuckets",
+            "GET",
+            download_url,
+            headers=headers,
+            params={"bucket": settings.smartbucket_name, "path": latest_path},
+        )
+        resp.raise_for_status()
+        return resp.json()
     except Exception as exc:
         logger.error("SmartBuckets download failed: %s", exc)
         return None
 
 
-async def fetch_recent_metrics(limit: int = 20) -> List[Dict]:
-    if not settings.liquid_metal_api_key:
-        return []
+MIRROR_PREFIX = "mirror/smartbuckets"
+
+
+async def _list_objects(prefix: str, limit: int) -> Optional[List[Dict]]:
     endpoint = f"{settings.smartbuckets_base_url.rstrip('/')}/objects"
     headers = {"Authorization": f"Bearer {settings.liquid_metal_api_key}"}
-    params = {"bucket": settings.smartbucket_name, "prefix": "metrics/", "limit": limit}
+    params = {"bucket": settings.smartbucket_name, "prefix": prefix, "limit": limit}
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(endpoint, headers=headers, params=params)
-            resp.raise_for_status()
-            objects = resp.json().get("objects", [])
+        resp = await http_pool.request("smartbuckets", "GET", endpoint, headers=headers, params=params)
+        resp.raise_for_status()
+        return resp.json().get("objects", [])
     except Exception as exc:
-        logger.error("SmartBuckets metrics list failed: %s", exc)
-        return []
+        logger.error("SmartBuckets list failed for %s: %s", prefix, exc)
+        return None
 
-    metrics = []
+
+async def _download_mirrored(path: str, limit: asyncio.Semaphore) -> Optional[Dict]:
+    # Metrics objects are immutable once written, so a local copy never goes stale.
+    mirror_path = f"{MIRROR_PREFIX}/{path}"
+    mirrored = await asyncio.to_thread(storage.read_json, mirror_path)
+    if mirrored is not None:
+        return mirrored
     download_url = f"{settings.smartbuckets_base_url.rstrip('/')}/download"
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        for obj in objects:
-            path = obj.get("path")
-            if not path:
+    headers = {"Authorization": f"Bearer {settings.liquid_metal_api_key}"}
+    try:
+        async with limit:
+            resp = await http_pool.request(
+                "smartbuckets",
+                "GET",
+                download_url,
+                headers=headers,
+                params={"bucket": settings.smartbucket_name, "path": path},
+            )
+        resp.raise_for_status()
+        data = resp.json()
+    except Exception as exc:
+        logger.debug("Skipping metrics %s: %s", path, exc)
+        return None
+    await asyncio.to_thread(storage.write_json, mirror_path, data)
+    return data
+
+
+async def _metrics_paths(limit: int) -> List[str]:
+    objects = await _list_objects("metrics/", limit)
+    return [obj["path"] for obj in objects or [] if obj.get("path")]
+
+
+async def fetch_recent_metrics(limit: int = 20) -> List[Dict]:
+    if not settings.liquid_metal_api_key:
+        return []
+    download_limit = asyncio.Semaphore(max(settings.smartbuckets_download_concurrency, 1))
+    paths = await _metrics_paths(limit)
+    downloaded = await asyncio.gather(*(_download_mirrored(path, download_limit) for path in paths))
+    return [data for data in downloaded if data is not None]
+
+
+async def stream_recent_metrics(limit: int = 20) -> AsyncIterator[RunMetrics]:
+    """Yield parsed metrics as each download completes (completion order, not listing order)."""
+    if not settings.liquid_metal_api_key:
+        return
+    download_limit = asyncio.Semaphore(max(settings.smartbuckets_download_concurrency, 1))
+    paths = await _metrics_paths(limit)
+    tasks = [asyncio.ensure_future(_download_mirrored(path, download_limit)) for path in paths]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            data = await next_done
+            if data is None:
                 continue
             try:
-                resp = await client.get(
-                    download_url, headers=headers, params={"bucket": settings.smartbucket_name, "path": path}
-                )
-                resp.raise_for_status()
-                metrics.append(resp.json())
+                yield RunMetrics(**data)
             except Exception as exc:
-                logger.debug("Skipping metrics %s: %s", path, exc)
-                continue
-    return metrics
+                logger.debug("Skipping malformed metrics: %s", exc)
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -10,7 +10,52 @@ class Settings(BaseSettings):
     temporal_address: str = "temporal:7233"
     temporal_task_queue: str = "research-company"
     worker_max_concurrency: int = 10
+    # Worker processes under the supervisor (0 = one per CPU core); limits below are per process
+    worker_processes: int = 0
+    worker_max_concurrent_activities: int = 50
+    # Activity classes each get their own task queue ("<temporal_task_queue>-<class>", "default" is the
+    # workflow queue itself) and their own per-process activity limit; WORKER_QUEUES picks which a worker serves.
+    worker_queues: str = "default,browse,llm,persistence"
+    worker_queue_max_concurrent_activities: Dict[str, int] = {
+        "default": 50,
+        "browse": 10,
+        "llm": 20,
+        "persistence": 50,
+    }
+    worker_max_concurrent_workflow_tasks: int = 20
+    worker_graceful_shutdown_seconds: float = 60.0
+    # Supervisor /health port reporting every worker process (0 disables)
+    worker_health_port: int = 9107
+    # Prometheus /metrics port on the worker (0 disables); supervised process N uses port + N.
+    # The API serves /metrics itself
+    worker_metrics_port: int = 9108
     workflow_run_timeout_seconds: int = 600
+    temporal_health_check_seconds: float = 30.0
+    bulk_default_concurrency: int = 10
+    bulk_max_concurrency: int = 100
+    bulk_max_companies: int = 5000
+    bulk_continue_as_new_every: int = 500
+    temporal_describe_cache_seconds: float = 1.0
+
+    # Browsing
+    # Browser sessions per worker process, shared by every browse activity it runs
+    browse_max_concurrency: int = 16
+    # Browsing heartbeats its progress; a retried attempt resumes from the last heartbeat
+    browse_heartbeat_seconds: float = 5.0
+    browse_heartbeat_timeout_seconds: float = 30.0
+    browse_max_attempts: int = 3
+    # Bounds on one Browser Use call and on one attempt of the browse activity, so a hung page
+    # fails its slot and a stalled attempt is retried well inside the 5 minute activity budget.
+    browse_page_timeout_seconds: float = 45.0
+    browse_attempt_timeout_seconds: float = 90.0
+    batch_scoring_enabled: bool = True
+    batch_scoring_token_budget: int = 8000
+    # Stream the brief from Claude and publish partial text for the UI
+    stream_briefs: bool = True
+    brief_stream_flush_seconds: float = 0.25
+    # Token budgets for the evidence packed into snapshot and policy prompts
+    snapshot_context_token_budget: int = 6000
+    policy_context_token_budget: int = 3000
 
     # External APIs
     linkup_api_key: Optional[str] = None
@@ -20,17 +65,89 @@ class Settings(BaseSettings):
     freepic_secret: Optional[str] = None
     anthropic_api_key: Optional[str] = None
     smartbucket_name: str = "self-evolving-agents-bucket"
+    smartbuckets_download_concurrency: int = 8
+    self_learning_metrics_limit: int = 20
 
     # Optional endpoints
     linkup_base_url: str = "https://api.linkup.so"
     browser_use_base_url: str = "https://api.browser-use.com"
     smartbuckets_base_url: str = "https://api.smartbuckets.ai"
     freepic_base_url: str = "https://api.freepik.com/v1/resources"
+    anthropic_base_url: str = "https://api.anthropic.com"
+
+    # Outbound HTTP pools (one per provider)
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry_seconds: float = 30.0
+    http_connect_timeout_seconds: float = 5.0
+    http2_enabled: bool = False
+    linkup_timeout_seconds: float = 15.0
+    browser_use_timeout_seconds: float = 60.0
+    anthropic_timeout_seconds: float = 30.0
+    freepik_timeout_seconds: float = 10.0
+    smartbuckets_timeout_seconds: float = 10.0
+
+    # Provider rate limits, shared by all processes on the host
+    rate_limit_enabled: bool = True
+    rate_limit_rps: Dict[str, float] = {
+        "linkup": 5.0,
+        "browser_use": 2.0,
+        "anthropic": 4.0,
+        "freepik": 5.0,
+        "smartbuckets": 20.0,
+    }
+    rate_limit_default_rps: float = 5.0
+    rate_limit_backoff_factor: float = 0.5
+    rate_limit_recovery_fraction: float = 0.05
+    rate_limit_min_fraction: float = 0.1
+    rate_limit_default_backoff_seconds: float = 5.0
+    rate_limit_max_wait_seconds: float = 60.0
+    rate_limit_max_retries: int = 3
+
+    # Local document storage: json (pretty, legacy), compact, gzip or zstd (needs `zstandard`)
+    storage_format: str = "json"
+
+    # Write-behind persistence
+    persistence_batch_delay_seconds: float = 0.005
+    persistence_max_batch: int = 64
+    persistence_fsync: bool = True
+    persistence_upload_concurrency: int = 8
+    persistence_upload_attempts: int = 3
+
+    # Caches
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_seconds: int = 7 * 24 * 3600
+    llm_cache_max_bytes: int = 256 * 1024 * 1024
+    linkup_cache_ttl_seconds: float = 300.0
+    # In-process policy cache; save_new_policy invalidates it immediately on this host.
+    policy_cache_ttl_seconds: float = 60.0
+    extraction_cache_enabled: bool = True
+    extraction_cache_max_bytes: int = 256 * 1024 * 1024
+    extraction_cache_default_max_age_seconds: int = 24 * 3600
+    # Freshness per Browser Use page_type; JSON object when set via env.
+    extraction_cache_max_age_by_page_type: Dict[str, int] = {
+        "pricing": 6 * 3600,
+        "product": 3 * 24 * 3600,
+        "solutions": 3 * 24 * 3600,
+        "about": 7 * 24 * 3600,
+    }
+
+    # URL selection by historical usefulness per browse-second (data/page_stats.sqlite3)
+    page_yield_ranking_enabled: bool = True
+    # Pseudo-observations pulling sparse path/domain stats towards the broader average.
+    page_yield_prior_pages: float = 3.0
+    page_yield_default_browse_seconds: float = 8.0
+    # Observations of a path before a low expected usefulness can drop it from a run.
+    page_yield_min_observations: int = 5
+    # Chance per run of browsing one of those dropped URLs anyway, so its stats can recover.
+    page_yield_explore_rate: float = 0.1
 
     # Service
     host: str = "0.0.0.0"
     port: int = 8000
     frontend_title: str = "Self-Evolving Account Researcher"
+    agent_wall_stream_poll_seconds: float = 0.5
+    agent_wall_stream_idle_seconds: float = 600.0
 
 
 settings = Settings()
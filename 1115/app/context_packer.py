@@ -0,0 +1,164 @@
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.clients.anthropic_client import estimate_tokens
+from app.models import LinkupResult, PageExtraction, RunMetrics
+
+logger = logging.getLogger(__name__)
+
+# Fields that tend to repeat verbatim across pages of the same company.
+DEDUP_FIELDS = ("signals", "pain_points", "product_lines")
+# Items squeezed into the last bit of budget are only worth it if they keep some content.
+MIN_TRUNCATED_TOKENS = 48
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int
+    original_tokens: int
+    items_kept: int
+    items_dropped: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.original_tokens - self.tokens, 0)
+
+    def log(self, label: str) -> None:
+        logger.info(
+            "Packed %s context: %s -> %s tokens (saved %s), kept %s items, dropped %s",
+            label,
+            self.original_tokens,
+            self.tokens,
+            self.tokens_saved,
+            self.items_kept,
+            self.items_dropped,
+        )
+
+
+def _compact(value: Any) -> Any:
+    """Recursively drop None, empty strings and empty collections."""
+    if isinstance(value, dict):
+        cleaned = {k: _compact(v) for k, v in value.items()}
+        return {k: v for k, v in cleaned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        cleaned = [_compact(v) for v in value]
+        return [v for v in cleaned if v not in (None, "", [], {})]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _dumps(item: Dict[str, Any]) -> str:
+    return json.dumps(item, separators=(",", ":"), default=str)
+
+
+def _truncate(item: Dict[str, Any], max_tokens: int) -> Optional[str]:
+    """Shorten the longest string field until the item fits ``max_tokens``; None if it can't."""
+    item = dict(item)
+    line = _dumps(item)
+    while estimate_tokens(line) > max_tokens:
+        strings = [(len(v), k) for k, v in item.items() if isinstance(v, str)]
+        if not strings:
+            return None
+        length, key = max(strings)
+        overflow_chars = (estimate_tokens(line) - max_tokens) * 4 + 8
+        if length <= overflow_chars:
+            return None
+        item[key] = item[key][: length - overflow_chars].rstrip() + "…"
+        line = _dumps(item)
+    return line
+
+
+def _pack_sections(
+    sections: List[Tuple[str, List[Dict[str, Any]]]], budget_tokens: int, original_tokens: int
+) -> PackedContext:
+    """Greedily fill ``budget_tokens`` with items in order; ``sections`` is [(heading, [item, ...])]."""
+    remaining = budget_tokens
+    kept = dropped = 0
+    parts: List[str] = []
+    for heading, items in sections:
+        lines: List[str] = []
+        for item in items:
+            line = _dumps(item)
+            cost = estimate_tokens(line)
+            if cost > remaining and remaining >= MIN_TRUNCATED_TOKENS:
+                line = _truncate(item, remaining)
+                cost = estimate_tokens(line) if line else cost
+            if line is None or cost > remaining:
+                dropped += 1
+                continue
+            lines.append(line)
+            remaining -= cost
+            kept += 1
+        if lines:
+            parts.append(heading + "\n" + "\n".join(lines))
+    text = "\n".join(parts)
+    return PackedContext(
+        text=text,
+        tokens=estimate_tokens(text),
+        original_tokens=original_tokens,
+        items_kept=kept,
+        items_dropped=dropped,
+    )
+
+
+def pack_snapshot_context(
+    linkup_results: List[LinkupResult], pages: List[PageExtraction], budget_tokens: int
+) -> PackedContext:
+    original_tokens = estimate_tokens(
+        f"Linkup results: { [r.model_dump() for r in linkup_results] }\nPages: { [p.model_dump() for p in pages] }"
+    )
+
+    seen: Dict[str, Set[str]] = {field: set() for field in DEDUP_FIELDS}
+    page_items = []
+    for page in sorted(pages, key=lambda p: p.usefulness_score, reverse=True):
+        item = page.model_dump(mode="json", exclude={"browse_seconds"})
+        for field in DEDUP_FIELDS:
+            fresh = []
+            for value in item.get(field) or []:
+                key = " ".join(value.lower().split())
+                if key and key not in seen[field]:
+                    seen[field].add(key)
+                    fresh.append(value)
+            item[field] = fresh
+        item["usefulness_score"] = round(page.usefulness_score, 2)
+        page_items.append(_compact(item))
+
+    seen_urls: Set[str] = {item.get("url") for item in page_items}
+    linkup_items = []
+    for result in linkup_results:
+        item = _compact(result.model_dump(mode="json"))
+        if item.get("url") in seen_urls and not item.get("snippet"):
+            continue
+        seen_urls.add(item.get("url"))
+        linkup_items.append(item)
+
+    return _pack_sections(
+        [("Pages (most useful first):", page_items), ("Linkup results:", linkup_items)],
+        budget_tokens,
+        original_tokens,
+    )
+
+
+def _recency(metric: RunMetrics) -> Tuple[datetime, str]:
+    # Metrics without created_at sort last; snapshot_id keeps the order (and the prompt) stable.
+    created_at = metric.created_at.replace(tzinfo=None) if metric.created_at else datetime.min
+    return created_at, metric.snapshot_id
+
+
+def pack_metrics_context(metrics: List[RunMetrics], budget_tokens: int) -> PackedContext:
+    original_tokens = estimate_tokens(f"Metrics: {[m.model_dump() for m in metrics]}")
+    items = []
+    # Newest first, so truncation drops the oldest runs whatever order the downloads finished in.
+    for metric in sorted(metrics, key=_recency, reverse=True):
+        item = metric.model_dump(mode="json", exclude={"created_at"})
+        # Only the company name matters for policy tuning; persona/notes are per-run noise.
+        item["company"] = metric.company.name
+        item["avg_usefulness"] = round(metric.avg_usefulness, 3)
+        item["tool_failures"] = {k: v for k, v in metric.tool_failures.items() if v}
+        items.append(_compact(item))
+    return _pack_sections([("Metrics (one run per line, newest first):", items)], budget_tokens, original_tokens)
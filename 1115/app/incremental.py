@@ -0,0 +1,55 @@
+from typing import Dict, List, Optional
+
+from app.cache import make_key
+from app.clients.browser_use import normalize_url
+from app.models import CompanySnapshot, LinkupResult, PageExtraction
+
+# Pure helpers for incremental refreshes; they run inside workflow code, so keep them deterministic.
+
+
+def linkup_hash(result: LinkupResult) -> str:
+    return make_key(normalize_url(str(result.url)), result.title.strip(), result.snippet.strip())
+
+
+def page_hash(page: PageExtraction) -> str:
+    return make_key(
+        page.page_type,
+        page.icp,
+        sorted(page.product_lines),
+        sorted(page.pain_points),
+        sorted(page.signals),
+        page.raw_text_excerpt.strip(),
+    )
+
+
+def _pages_by_url(pages: List[PageExtraction]) -> Dict[str, PageExtraction]:
+    return {normalize_url(str(page.url)): page for page in pages}
+
+
+def reusable_pages(previous: Optional[CompanySnapshot], linkup_results: List[LinkupResult]) -> List[PageExtraction]:
+    """Prior extractions for URLs whose Linkup result (title and snippet) is unchanged.
+
+    Failed browses (``page_type == "error"``) are never reused, so those URLs are browsed again."""
+    if previous is None:
+        return []
+    previous_hashes = {normalize_url(str(r.url)): linkup_hash(r) for r in previous.linkup_results}
+    previous_pages = _pages_by_url(previous.pages)
+    reused = []
+    for result in linkup_results:
+        key = normalize_url(str(result.url))
+        page = previous_pages.get(key)
+        if page is not None and page.page_type != "error" and previous_hashes.get(key) == linkup_hash(result):
+            reused.append(page)
+    return reused
+
+
+def has_material_change(
+    previous: CompanySnapshot, linkup_results: List[LinkupResult], pages: List[PageExtraction]
+) -> bool:
+    if {linkup_hash(r) for r in linkup_results} != {linkup_hash(r) for r in previous.linkup_results}:
+        return True
+    previous_pages = _pages_by_url(previous.pages)
+    current_pages = _pages_by_url(pages)
+    if set(current_pages) != set(previous_pages):
+        return True
+    return any(page_hash(page) != page_hash(previous_pages[url]) for url, page in current_pages.items())
@@ -1,21 +1,28 @@
 import asyncio
+import json
 import logging
+import time
+import uuid
 from datetime import timedelta
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 from fastapi import FastAPI, HTTPException, Query, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from temporalio.client import Client
+from temporalio.service import RPCError, RPCStatusCode
 
-from app import storage
-from app.agent_wall import list_window_states
+from app import storage, telemetry
+from app.bulk import ingest_companies
+from app.cache import MemoryTTLCache, SingleFlight, all_cache_stats
+from app.agent_wall import RUNS_DIR, get_run_view, list_window_states, read_brief_draft
 from app.activities import fetch_recent_metrics_from_memory, load_policy
+from app.clients import http_pool
 from app.config import settings
-from app.models import CompanyInput
-from app.workflows import ResearchCompanyWorkflow, SelfLearningWorkflow
+from app.models import BulkResearchInput, CompanyInput
+from app.workflows import BulkResearchWorkflow, ResearchCompanyWorkflow, SelfLearningWorkflow
 
 logger = logging.getLogger(__name__)
 
@@ -25,22 +32,63 @@ BASE_DIR = Path(__file__).resolve().parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
 if Path("/data").exists():
-    app.mount("/runs", StaticFiles(directory="/data"), name="runs")
+    # Only Agent Wall run files; the rest of /data holds documents, caches and indexes.
+    app.mount("/runs", StaticFiles(directory=str(RUNS_DIR)), name="runs")
+
+
+# One long-lived Temporal client per API process, health-checked periodically and
+# recreated after a connection failure.
+_temporal_client: Optional[Client] = None
+_temporal_checked_at = 0.0
+_temporal_lock = asyncio.Lock()
+
+TERMINAL_STATUS_CACHE_SECONDS = 60.0
+_status_cache = MemoryTTLCache(ttl_seconds=settings.temporal_describe_cache_seconds, name="run_status")
+_status_flight = SingleFlight()
 
 
 async def get_temporal_client() -> Client:
-    return await Client.connect(settings.temporal_address, namespace=settings.temporal_namespace)
+    global _temporal_client, _temporal_checked_at
+    async with _temporal_lock:
+        now = time.monotonic()
+        if _temporal_client is not None and now - _temporal_checked_at > settings.temporal_health_check_seconds:
+            try:
+                await _temporal_client.service_client.check_health(timeout=timedelta(seconds=5))
+                _temporal_checked_at = now
+            except Exception as exc:
+                logger.warning("Temporal health check failed, reconnecting: %s", exc)
+                _temporal_client = None
+        if _temporal_client is None:
+            _temporal_client = await Client.connect(settings.temporal_address, namespace=settings.temporal_namespace)
+            _temporal_checked_at = time.monotonic()
+        return _temporal_client
+
+
+def _handle_temporal_error(exc: Exception) -> None:
+    global _temporal_client
+    if isinstance(exc, RPCError) and exc.status == RPCStatusCode.UNAVAILABLE:
+        _temporal_client = None
 
 
 @app.on_event("startup")
 async def startup_event() -> None:
-    # Warm up client lazily to surface misconfiguration early in logs.
+    # The API is the one process that exports the host-wide disk cache counters.
+    telemetry.register_cache_metrics(include_shared=True)
+    await http_pool.open_clients()
+    # Warm up the shared client to surface misconfiguration early in logs.
     try:
         await get_temporal_client()
     except Exception as exc:
         logger.warning("Temporal connection failed on startup: %s", exc)
 
 
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    global _temporal_client
+    _temporal_client = None
+    await http_pool.close_clients()
+
+
 @app.get("/", response_class=HTMLResponse)
 async def serve_ui(request: Request) -> HTMLResponse:
     return templates.TemplateResponse(
@@ -58,41 +106,150 @@ async def health() -> dict:
 
 
 @app.post("/api/run_research")
-async def start_research(company: CompanyInput) -> dict:
+async def start_research(company: CompanyInput, incremental: bool = False) -> dict:
     try:
         client = await get_temporal_client()
         handle = await client.start_workflow(
             ResearchCompanyWorkflow.run,
-            company,
-            id=f"research-{company.name}-{id(company)}",
+            args=[company, incremental],
+            # Unique per request: the Agent Wall event log and tool-failure counts are keyed on it.
+            id=f"research-{company.name}-{uuid.uuid4().hex[:12]}",
             task_queue=settings.temporal_task_queue,
             execution_timeout=timedelta(seconds=settings.workflow_run_timeout_seconds),
         )
         return {"workflow_id": handle.id, "run_id": handle.first_execution_run_id}
     except Exception as exc:
+        _handle_temporal_error(exc)
         logger.error("Failed to start ResearchCompanyWorkflow: %s", exc)
         raise HTTPException(status_code=500, detail="Unable to start workflow") from exc
 
 
-@app.get("/api/run_status")
-async def run_status(workflow_id: str = Query(...)) -> dict:
+@app.post("/api/bulk_research")
+async def start_bulk_research(
+    request: Request,
+    concurrency: int = Query(settings.bulk_default_concurrency, ge=1),
+    format: Optional[str] = Query(None, pattern="^(jsonl|csv)$"),
+    incremental: bool = False,
+) -> dict:
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("csv" if "csv" in content_type else "jsonl")
+    try:
+        ingested = await ingest_companies(request.stream(), fmt, settings.bulk_max_companies)
+    except ValueError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    if not ingested.companies:
+        raise HTTPException(
+            status_code=400, detail={"message": "No valid companies in request", "rejected": ingested.rejected}
+        )
+
+    batch_id = uuid.uuid4().hex[:12]
+    batch = BulkResearchInput(
+        batch_id=batch_id,
+        companies=ingested.companies,
+        concurrency=min(concurrency, settings.bulk_max_concurrency),
+        child_timeout_seconds=settings.workflow_run_timeout_seconds,
+        continue_as_new_every=settings.bulk_continue_as_new_every,
+        total=len(ingested.companies),
+        incremental=incremental,
+    )
+    try:
+        client = await get_temporal_client()
+        handle = await client.start_workflow(
+            BulkResearchWorkflow.run,
+            batch,
+            id=f"bulk-research-{batch_id}",
+            task_queue=settings.temporal_task_queue,
+        )
+    except Exception as exc:
+        _handle_temporal_error(exc)
+        logger.error("Failed to start BulkResearchWorkflow: %s", exc)
+        raise HTTPException(status_code=500, detail="Unable to start bulk workflow") from exc
+    return {
+        "workflow_id": handle.id,
+        "batch_id": batch_id,
+        "accepted": len(ingested.companies),
+        "duplicates": ingested.duplicates,
+        "rejected_count": ingested.rejected_count,
+        "rejected": ingested.rejected,
+    }
+
+
+@app.get("/api/bulk_status")
+async def bulk_status(workflow_id: str = Query(...)) -> dict:
     try:
         client = await get_temporal_client()
         handle = client.get_workflow_handle(workflow_id=workflow_id)
         info = await handle.describe()
         status = info.status.name if hasattr(info.status, "name") else str(info.status)
-        response: Dict[str, Optional[str]] = {"status": status, "snapshot_id": None, "error": None}
         if status == "COMPLETED":
-            try:
-                response["snapshot_id"] = await handle.result()
-            except Exception as exc:
-                response["error"] = str(exc)
-        return response
+            progress = await handle.result()
+        else:
+            progress = await handle.query(BulkResearchWorkflow.progress)
+    except Exception as exc:
+        _handle_temporal_error(exc)
+        logger.error("Failed to fetch bulk status: %s", exc)
+        raise HTTPException(status_code=500, detail="Unable to fetch bulk status") from exc
+    data = progress.model_dump() if hasattr(progress, "model_dump") else dict(progress)
+    return {"status": status, **data}
+
+
+async def _describe_run(workflow_id: str) -> dict:
+    client = await get_temporal_client()
+    handle = client.get_workflow_handle(workflow_id=workflow_id)
+    info = await handle.describe()
+    status = info.status.name if hasattr(info.status, "name") else str(info.status)
+    response: Dict[str, Any] = {
+        "status": status,
+        "snapshot_id": None,
+        "stage_timings": None,
+        "reused_pages": 0,
+        "brief_reused": False,
+        "error": None,
+    }
+    if status == "COMPLETED":
+        try:
+            result = await handle.result()
+        except Exception as exc:
+            response["error"] = str(exc)
+        else:
+            # Runs started before the stage-timing result shape returned a bare snapshot id.
+            if isinstance(result, dict):
+                response["snapshot_id"] = result.get("snapshot_id")
+                response["stage_timings"] = result.get("stage_timings")
+                response["reused_pages"] = result.get("reused_pages", 0)
+                response["brief_reused"] = result.get("brief_reused", False)
+            else:
+                response["snapshot_id"] = result
+    # Finished runs never change, so they can be served from cache much longer.
+    ttl = None if status == "RUNNING" else TERMINAL_STATUS_CACHE_SECONDS
+    _status_cache.set(workflow_id, response, ttl_seconds=ttl)
+    return response
+
+
+@app.get("/api/run_status")
+async def run_status(workflow_id: str = Query(...)) -> dict:
+    cached = _status_cache.get(workflow_id)
+    if cached is not None:
+        return dict(cached)
+    try:
+        return dict(await _status_flight.do(workflow_id, lambda: _describe_run(workflow_id)))
     except Exception as exc:
+        _handle_temporal_error(exc)
         logger.error("Failed to fetch run status: %s", exc)
         raise HTTPException(status_code=500, detail="Unable to fetch status") from exc
 
 
+@app.get("/metrics")
+async def metrics() -> Response:
+    # Disk cache counters are SQLite reads; keep the scrape off the event loop.
+    return Response(await asyncio.to_thread(telemetry.render_latest), media_type=telemetry.CONTENT_TYPE_LATEST)
+
+
+@app.get("/api/cache/stats")
+async def cache_stats() -> dict:
+    return {"caches": all_cache_stats()}
+
+
 @app.get("/api/snapshot/{snapshot_id}")
 async def get_snapshot(snapshot_id: str) -> dict:
     local = storage.read_json(f"snapshots/{snapshot_id}.json")
@@ -107,10 +264,83 @@ async def get_run_windows(run_id: str) -> dict:
     return {"items": [w.model_dump() for w in windows]}
 
 
+async def _list_indexed(prefix: str, **kwargs) -> dict:
+    try:
+        # Reads each listed document from disk; keep that off the event loop.
+        items, next_cursor = await asyncio.to_thread(storage.list_indexed, prefix, **kwargs)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@app.get("/api/run/{run_id}/windows/stream")
+async def stream_run_windows(run_id: str, request: Request) -> StreamingResponse:
+    async def events():
+        sent: Dict[int, str] = {}
+        last_activity = time.monotonic()
+        last_keepalive = last_activity
+        while not await request.is_disconnected():
+            view = get_run_view(run_id)
+            for slot in sorted(view.windows):
+                data = view.windows[slot].model_dump_json()
+                if sent.get(slot) != data:
+                    sent[slot] = data
+                    last_activity = time.monotonic()
+                    yield f"event: window\ndata: {data}\n\n"
+            if view.finished:
+                yield "event: end\ndata: {}\n\n"
+                return
+            now = time.monotonic()
+            if now - last_activity > settings.agent_wall_stream_idle_seconds:
+                return
+            if now - last_keepalive > 15:
+                last_keepalive = now
+                yield ": keepalive\n\n"
+            await asyncio.sleep(settings.agent_wall_stream_poll_seconds)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/run/{run_id}/brief/stream")
+async def stream_run_brief(run_id: str, request: Request) -> StreamingResponse:
+    async def events():
+        sent: Optional[str] = None
+        last_activity = time.monotonic()
+        last_keepalive = last_activity
+        while not await request.is_disconnected():
+            draft = read_brief_draft(run_id)
+            if draft is not None:
+                data = json.dumps(draft)
+                if data != sent:
+                    sent = data
+                    last_activity = time.monotonic()
+                    yield f"event: brief\ndata: {data}\n\n"
+                if draft.get("done"):
+                    yield "event: end\ndata: {}\n\n"
+                    return
+            now = time.monotonic()
+            if now - last_activity > settings.agent_wall_stream_idle_seconds:
+                return
+            if now - last_keepalive > 15:
+                last_keepalive = now
+                yield ": keepalive\n\n"
+            await asyncio.sleep(settings.agent_wall_stream_poll_seconds)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/history")
-async def history(limit: int = 20) -> dict:
-    metrics = storage.list_json("metrics")
-    return {"items": metrics[:limit]}
+async def history(
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = None,
+    company: Optional[str] = None,
+    policy_version: Optional[str] = None,
+) -> dict:
+    return await _list_indexed("metrics", limit=limit, cursor=cursor, company=company, policy_version=policy_version)
 
 
 @app.get("/api/policy")
@@ -124,9 +354,8 @@ async def current_policy() -> dict:
 
 
 @app.get("/api/policy/versions")
-async def policy_versions() -> dict:
-    versions = storage.list_json("policy")
-    return {"items": versions}
+async def policy_versions(limit: int = Query(50, ge=1, le=500), cursor: Optional[str] = None) -> dict:
+    return await _list_indexed("policy", limit=limit, cursor=cursor)
 
 
 @app.post("/api/self_learn")
@@ -141,5 +370,6 @@ async def start_self_learning() -> dict:
         )
         return {"workflow_id": handle.id, "run_id": handle.first_execution_run_id}
     except Exception as exc:
+        _handle_temporal_error(exc)
         logger.error("Failed to start SelfLearningWorkflow: %s", exc)
         raise HTTPException(status_code=500, detail="Unable to start self-learning workflow") from exc
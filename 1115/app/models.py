@@ -28,6 +28,8 @@ class PageExtraction(BaseModel):
     raw_text_excerpt: str
     usefulness_score: float
     notes: Optional[str] = None
+    # Wall-clock seconds of the Browser Use call; None for cached extractions.
+    browse_seconds: Optional[float] = None
 
 
 class CompanySnapshot(BaseModel):
@@ -42,6 +44,15 @@ class CompanySnapshot(BaseModel):
     freepik_asset_url: Optional[str] = None
 
 
+class ResearchRunResult(BaseModel):
+    snapshot_id: str
+    # Seconds per stage (workflow time), plus "total" for the whole run.
+    stage_timings: Dict[str, float] = {}
+    # Incremental refreshes: pages carried over from the previous snapshot, and whether its brief was kept.
+    reused_pages: int = 0
+    brief_reused: bool = False
+
+
 class BrowsingPolicy(BaseModel):
     version: str = "v1"
     linkup_query_template: str = (
@@ -51,6 +62,7 @@ class BrowsingPolicy(BaseModel):
     allowed_domains: List[str] = []
     preferred_paths: List[str] = ["/about", "/pricing", "/solutions", "/product"]
     max_pages_per_domain: int = 4
+    max_concurrent_per_domain: int = 2
     min_usefulness_threshold: float = 0.2
 
 
@@ -63,6 +75,8 @@ class RunMetrics(BaseModel):
     num_useful_pages: int
     avg_usefulness: float
     tool_failures: Dict[str, int]
+    # Snapshot creation time; None for metrics logged before it was recorded.
+    created_at: Optional[datetime] = None
 
 
 class AgentWindowState(BaseModel):
@@ -74,3 +88,26 @@ class AgentWindowState(BaseModel):
     screenshot_url: Optional[str] = None
     usefulness_score: Optional[float] = None
     updated_at: datetime
+
+
+class BulkResearchInput(BaseModel):
+    batch_id: str
+    companies: List[CompanyInput]
+    concurrency: int = 10
+    child_timeout_seconds: int = 600
+    continue_as_new_every: int = 500
+    incremental: bool = False
+    # Carried across continue-as-new so progress stays aggregate for the whole batch.
+    total: int = 0
+    next_index: int = 0
+    completed: int = 0
+    failed: int = 0
+
+
+class BulkResearchProgress(BaseModel):
+    batch_id: str
+    total: int
+    completed: int
+    failed: int
+    in_flight: int
+    pending: int
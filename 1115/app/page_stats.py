@@ -0,0 +1,220 @@
+import logging
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import urlsplit
+
+from app import storage
+from app.cache import make_key
+from app.clients.browser_use import normalize_url
+from app.config import settings
+from app.incremental import page_hash
+from app.models import CompanySnapshot, PageExtraction
+
+logger = logging.getLogger(__name__)
+
+# Historical page yield, aggregated per domain, URL path pattern and page_type from stored
+# snapshots, so URL selection can rank candidates by expected usefulness per browse-second.
+
+STATS_PATH = storage.DATA_DIR / "page_stats.sqlite3"
+MIN_BROWSE_SECONDS = 0.5
+# Browse failures say nothing about what a page is worth.
+SKIPPED_PAGE_TYPES = ("error",)
+
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-f]{8,}|[0-9a-f-]{32,36})$")
+
+
+@dataclass
+class PageEstimate:
+    usefulness: float
+    browse_seconds: float
+    observations: int
+
+    @property
+    def yield_per_second(self) -> float:
+        return self.usefulness / max(self.browse_seconds, MIN_BROWSE_SECONDS)
+
+
+def path_pattern(url: str) -> str:
+    """First path segment, with ``/*`` when the URL goes deeper: ``/blog/2024/post`` -> ``/blog/*``."""
+    segments = [s for s in urlsplit(normalize_url(url)).path.lower().split("/") if s]
+    if not segments:
+        return "/"
+    head = ":id" if _ID_SEGMENT.match(segments[0]) else segments[0]
+    return f"/{head}/*" if len(segments) > 1 else f"/{head}"
+
+
+def _domain(url: str) -> str:
+    return (urlsplit(normalize_url(url)).hostname or "").lower()
+
+
+def _connect() -> sqlite3.Connection:
+    STATS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(STATS_PATH, timeout=10.0, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS stats ("
+        "dimension TEXT NOT NULL, key TEXT NOT NULL, pages INTEGER NOT NULL, usefulness_sum REAL NOT NULL, "
+        "timed_pages INTEGER NOT NULL, browse_seconds_sum REAL NOT NULL, PRIMARY KEY (dimension, key))"
+    )
+    # One row per distinct page observation, so re-ingesting a snapshot (or a page an incremental
+    # refresh carried over) never counts twice.
+    conn.execute("CREATE TABLE IF NOT EXISTS seen (fingerprint TEXT PRIMARY KEY)")
+    return conn
+
+
+def _dimensions(page: PageExtraction) -> List[Tuple[str, str]]:
+    url = str(page.url)
+    domain, pattern = _domain(url), path_pattern(url)
+    page_type = (page.page_type or "unknown").lower()
+    return [
+        ("all", "*"),
+        ("domain", domain),
+        ("path", pattern),
+        ("domain_path", f"{domain}{pattern}"),
+        ("page_type", page_type),
+        # Counts only; used to predict a candidate's page_type from its path before browsing it.
+        ("path_page_type", f"{pattern} {page_type}"),
+    ]
+
+
+def _record_pages(conn: sqlite3.Connection, pages: Iterable[PageExtraction]) -> int:
+    recorded = 0
+    for page in pages:
+        if page.page_type in SKIPPED_PAGE_TYPES:
+            continue
+        fingerprint = make_key(normalize_url(str(page.url)), page_hash(page), page.browse_seconds)
+        if conn.execute("INSERT OR IGNORE INTO seen (fingerprint) VALUES (?)", (fingerprint,)).rowcount == 0:
+            continue
+        timed = page.browse_seconds is not None
+        conn.executemany(
+            "INSERT INTO stats (dimension, key, pages, usefulness_sum, timed_pages, browse_seconds_sum) "
+            "VALUES (?, ?, 1, ?, ?, ?) ON CONFLICT(dimension, key) DO UPDATE SET "
+            "pages = pages + 1, usefulness_sum = usefulness_sum + excluded.usefulness_sum, "
+            "timed_pages = timed_pages + excluded.timed_pages, "
+            "browse_seconds_sum = browse_seconds_sum + excluded.browse_seconds_sum",
+            [
+                (dimension, key, page.usefulness_score, int(timed), page.browse_seconds or 0.0)
+                for dimension, key in _dimensions(page)
+            ],
+        )
+        recorded += 1
+    return recorded
+
+
+def record_snapshot(snapshot: CompanySnapshot) -> int:
+    """Fold a snapshot's pages into the index; returns pages not seen before. Blocking: async
+    callers run it (and ``estimate``) in a thread."""
+    try:
+        conn = _connect()
+        try:
+            conn.execute("BEGIN")
+            recorded = _record_pages(conn, snapshot.pages)
+            conn.execute("COMMIT")
+            return recorded
+        finally:
+            conn.close()
+    except Exception as exc:
+        logger.warning("Failed to record page stats for snapshot %s: %s", snapshot.snapshot_id, exc)
+        return 0
+
+
+def backfill(rebuild: bool = False) -> Tuple[int, int]:
+    """Fold every stored snapshot into the index; returns ``(snapshots, new pages)``."""
+    conn = _connect()
+    snapshots = recorded = 0
+    try:
+        conn.execute("BEGIN")
+        if rebuild:
+            conn.execute("DELETE FROM stats")
+            conn.execute("DELETE FROM seen")
+        for relative_path, _ in storage.iter_documents("snapshots"):
+            data = storage.read_json(relative_path)
+            if data is None:
+                continue
+            try:
+                snapshot = CompanySnapshot(**data)
+            except Exception as exc:
+                logger.warning("Skipping unreadable snapshot %s: %s", relative_path, exc)
+                continue
+            snapshots += 1
+            recorded += _record_pages(conn, snapshot.pages)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return snapshots, recorded
+
+
+def _load(conn: sqlite3.Connection, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple]:
+    rows: Dict[Tuple[str, str], Tuple] = {}
+    for dimension in {d for d, _ in keys}:
+        wanted = sorted({k for d, k in keys if d == dimension})
+        placeholders = ",".join("?" * len(wanted))
+        for row in conn.execute(
+            "SELECT key, pages, usefulness_sum, timed_pages, browse_seconds_sum FROM stats "
+            f"WHERE dimension = ? AND key IN ({placeholders})",
+            [dimension, *wanted],
+        ):
+            rows[(dimension, row[0])] = row[1:]
+    return rows
+
+
+def _shrink(prior: float, total: float, count: int) -> float:
+    # Each level pulls the broader estimate towards its own mean in proportion to its evidence.
+    weight = settings.page_yield_prior_pages
+    return (total + weight * prior) / (count + weight)
+
+
+def estimate(urls: List[str]) -> Dict[str, PageEstimate]:
+    """Expected usefulness and browse time per URL, from global down to domain-and-path history.
+
+    Returns an empty dict when there is no history yet or the index cannot be read."""
+    if not urls:
+        return {}
+    try:
+        conn = _connect()
+        try:
+            by_url = {url: (_domain(url), path_pattern(url)) for url in urls}
+            keys = [("all", "*")]
+            for domain, pattern in by_url.values():
+                keys += [("domain", domain), ("path", pattern), ("domain_path", f"{domain}{pattern}")]
+            rows = _load(conn, keys)
+            patterns = sorted({pattern for _, pattern in by_url.values()})
+            types: Dict[str, Tuple[int, str]] = {}
+            for pattern in patterns:
+                for key, pages in conn.execute(
+                    "SELECT key, pages FROM stats WHERE dimension = 'path_page_type' AND key >= ? AND key < ?",
+                    (f"{pattern} ", f"{pattern}!"),
+                ):
+                    if pages > types.get(pattern, (0, ""))[0]:
+                        types[pattern] = (pages, key[len(pattern) + 1 :])
+            rows.update(_load(conn, [("page_type", page_type) for _, page_type in types.values()]) if types else {})
+        finally:
+            conn.close()
+    except Exception as exc:
+        logger.warning("Failed to read page stats: %s", exc)
+        return {}
+
+    overall = rows.get(("all", "*"))
+    if not overall or not overall[0]:
+        return {}
+    usefulness = overall[1] / overall[0]
+    seconds = overall[3] / overall[2] if overall[2] else settings.page_yield_default_browse_seconds
+    estimates = {}
+    for url, (domain, pattern) in by_url.items():
+        levels = [("domain", domain), ("path", pattern), ("domain_path", f"{domain}{pattern}")]
+        if pattern in types:
+            levels.insert(0, ("page_type", types[pattern][1]))
+        expected_usefulness, expected_seconds, observations = usefulness, seconds, 0
+        for level in levels:
+            row = rows.get(level)
+            if not row:
+                continue
+            pages, usefulness_sum, timed_pages, seconds_sum = row
+            expected_usefulness = _shrink(expected_usefulness, usefulness_sum, pages)
+            expected_seconds = _shrink(expected_seconds, seconds_sum, timed_pages)
+            if level[0] in ("path", "domain_path"):
+                observations = max(observations, pages)
+        estimates[url] = PageEstimate(expected_usefulness, expected_seconds, observations)
+    return estimates
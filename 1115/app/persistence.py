@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from app import storage
+from app.clients import smartbuckets
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """Batches local document writes onto a background thread and runs SmartBuckets uploads
+    concurrently with retry. Callers await the futures they were handed, so one activity never
+    waits on another's uploads."""
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional["asyncio.Queue[Tuple[str, Dict[str, Any], asyncio.Future]]"] = None
+        self._writer: Optional["asyncio.Task[None]"] = None
+        self._upload_limit: Optional[asyncio.Semaphore] = None
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._writer is None or self._writer.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._upload_limit = asyncio.Semaphore(max(settings.persistence_upload_concurrency, 1))
+            self._writer = loop.create_task(self._run_local_writer())
+        return loop
+
+    def write_local(self, relative_path: str, payload: Dict[str, Any]) -> asyncio.Future:
+        loop = self._ensure_started()
+        future = loop.create_future()
+        self._queue.put_nowait((relative_path, payload, future))
+        return future
+
+    def upload(self, path: str, payload: Dict[str, Any]) -> asyncio.Future:
+        self._ensure_started()
+        return asyncio.ensure_future(self._upload_with_retry(path, payload))
+
+    async def _run_local_writer(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            # Give concurrent writers a moment to join the batch so they share one fsync.
+            await asyncio.sleep(settings.persistence_batch_delay_seconds)
+            while not self._queue.empty() and len(batch) < settings.persistence_max_batch:
+                batch.append(self._queue.get_nowait())
+            items = [(path, payload) for path, payload, _ in batch]
+            try:
+                await asyncio.to_thread(storage.write_many, items, settings.persistence_fsync)
+            except Exception as exc:
+                logger.error("Local write batch failed for %s: %s", ", ".join(path for path, _ in items), exc)
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    async def _upload_with_retry(self, path: str, payload: Dict[str, Any]) -> bool:
+        if not settings.liquid_metal_api_key:
+            logger.warning("LIQUID_METAL_API_KEY missing; skipping SmartBuckets write.")
+            return False
+        try:
+            async with self._upload_limit:
+                async for attempt in AsyncRetrying(
+                    retry=retry_if_exception_type(httpx.HTTPError),
+                    stop=stop_after_attempt(settings.persistence_upload_attempts),
+                    wait=wait_exponential(multiplier=0.5, max=8),
+                    reraise=True,
+                ):
+                    with attempt:
+                        await smartbuckets.put_json(path, payload)
+            return True
+        except Exception as exc:
+            logger.error("SmartBuckets write failed for %s after retries: %s", path, exc)
+            return False
+
+
+_queue = WriteBehindQueue()
+
+
+def write_json(relative_path: str, payload: Dict[str, Any]) -> asyncio.Future:
+    """Queue a local write; the future raises if the batch it landed in failed."""
+    return _queue.write_local(relative_path, payload)
+
+
+def upload_json(path: str, payload: Dict[str, Any]) -> asyncio.Future:
+    """Start a SmartBuckets upload; the future resolves to False (never raises) if it gave up."""
+    return _queue.upload(path, payload)
@@ -0,0 +1,79 @@
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from app import storage
+from app.cache import MemoryTTLCache, SingleFlight
+from app.clients import smartbuckets
+from app.config import settings
+from app.models import BrowsingPolicy
+
+logger = logging.getLogger(__name__)
+
+LATEST_PATH = "policy/latest.json"
+# Rewritten by every save_new_policy; a different marker than the cached one means the cache is stale.
+VERSION_MARKER = storage.DATA_DIR / "policy.version"
+# A fallback to the default policy is cached briefly so a SmartBuckets outage is retried soon.
+FALLBACK_TTL_SECONDS = 10.0
+
+_cache = MemoryTTLCache(ttl_seconds=settings.policy_cache_ttl_seconds, max_entries=1, name="policy")
+_flight = SingleFlight()
+
+
+def _read_marker() -> str:
+    try:
+        return VERSION_MARKER.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ""
+    except OSError as exc:
+        logger.warning("Failed to read policy version marker: %s", exc)
+        return ""
+
+
+def _parse(stored: Optional[Dict[str, Any]], source: str) -> Optional[BrowsingPolicy]:
+    if not stored:
+        return None
+    try:
+        return BrowsingPolicy(**stored)
+    except Exception as exc:
+        logger.warning("Ignoring unparseable policy from %s: %s", source, exc)
+        return None
+
+
+async def _resolve(marker: str) -> BrowsingPolicy:
+    policy = _parse(storage.read_json(LATEST_PATH), "local storage")
+    if policy is None:
+        policy = _parse(await smartbuckets.fetch_latest_policy(), "SmartBuckets")
+    ttl = None
+    if policy is None:
+        logger.warning("Falling back to default policy")
+        policy, ttl = BrowsingPolicy(), min(FALLBACK_TTL_SECONDS, settings.policy_cache_ttl_seconds)
+    _cache.set("latest", (marker, policy), ttl)
+    return policy
+
+
+async def get_policy() -> BrowsingPolicy:
+    """Current browsing policy: in-process cache, then local ``policy/latest.json``, then SmartBuckets."""
+    marker = _read_marker()
+    cached = _cache.get("latest")
+    if cached is not None and cached[0] == marker:
+        policy = cached[1]
+    else:
+        policy = await _flight.do(f"latest:{marker}", lambda: _resolve(marker))
+    return policy.model_copy(deep=True)
+
+
+def mark_updated(policy: BrowsingPolicy) -> None:
+    """Bump the version marker after ``policy/latest.json`` is written and cache ``policy`` under it."""
+    marker = f"{policy.version} {time.time_ns()}"
+    tmp = VERSION_MARKER.with_name(f".{VERSION_MARKER.name}.{os.getpid()}.tmp")
+    try:
+        VERSION_MARKER.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(marker, encoding="utf-8")
+        os.replace(tmp, VERSION_MARKER)
+    except OSError as exc:
+        logger.warning("Failed to write policy version marker: %s", exc)
+        _cache.invalidate()
+        return
+    _cache.set("latest", (marker, policy.model_copy(deep=True)))
@@ -15,6 +15,8 @@ const agentWall = document.getElementById("agent-wall");
 
 let currentWorkflowId = null;
 let wallInterval = null;
+let wallSource = null;
+let briefSource = null;
 
 function setStatus(text, state = "idle") {
   statusPill.textContent = text;
@@ -52,7 +54,8 @@ async function runResearch(payload) {
     if (!res.ok) throw new Error("Failed to start run");
     const data = await res.json();
     currentWorkflowId = data.workflow_id;
-    startAgentWallPolling(currentWorkflowId);
+    startAgentWall(currentWorkflowId);
+    startBriefStream(currentWorkflowId);
     pollStatus(data.workflow_id);
   } catch (err) {
     console.error(err);
@@ -75,16 +78,19 @@ async function pollStatus(workflowId) {
           loadHistory();
         }
         stopAgentWallPolling();
+        stopBriefStream();
       } else {
         clearInterval(poll);
         setStatus("Error", "error");
         stopAgentWallPolling();
+        stopBriefStream();
       }
     } catch (err) {
       console.error(err);
       clearInterval(poll);
       setStatus("Error", "error");
       stopAgentWallPolling();
+      stopBriefStream();
     }
   }, 2000);
 }
@@ -153,13 +159,61 @@ function startAgentWallPolling(runId) {
   }, 2000);
 }
 
+function startAgentWall(runId) {
+  if (!window.EventSource) {
+    startAgentWallPolling(runId);
+    return;
+  }
+  stopAgentWallPolling();
+  renderAgentWall([]);
+  const windows = {};
+  wallSource = new EventSource(`/api/run/${encodeURIComponent(runId)}/windows/stream`);
+  wallSource.addEventListener("window", (e) => {
+    const w = JSON.parse(e.data);
+    windows[w.slot] = w;
+    renderAgentWall(Object.values(windows));
+  });
+  wallSource.addEventListener("end", () => {
+    wallSource.close();
+    wallSource = null;
+  });
+  wallSource.onerror = () => {
+    console.error("Agent wall stream error; falling back to polling");
+    startAgentWallPolling(runId);
+  };
+}
+
 function stopAgentWallPolling() {
+  if (wallSource) {
+    wallSource.close();
+    wallSource = null;
+  }
   if (wallInterval) {
     clearInterval(wallInterval);
     wallInterval = null;
   }
 }
 
+function startBriefStream(runId) {
+  stopBriefStream();
+  if (!window.EventSource) return;
+  briefSource = new EventSource(`/api/run/${encodeURIComponent(runId)}/brief/stream`);
+  briefSource.addEventListener("brief", (e) => {
+    const draft = JSON.parse(e.data);
+    if (draft.brief_md) briefContent.textContent = draft.brief_md;
+    if (draft.outreach_message) outreachContent.textContent = draft.outreach_message;
+  });
+  briefSource.addEventListener("end", stopBriefStream);
+  briefSource.onerror = stopBriefStream;
+}
+
+function stopBriefStream() {
+  if (briefSource) {
+    briefSource.close();
+    briefSource = null;
+  }
+}
+
 async function loadSnapshot(snapshotId) {
   try {
     const res = await fetch(`/api/snapshot/${snapshotId}`);
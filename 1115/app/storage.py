@@ -1,38 +1,336 @@
+import gzip
 import json
+import logging
+import os
+import sqlite3
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-DATA_DIR = Path(__file__).resolve().parent / "data"
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# The docker-compose ``/data`` volume is shared by the API and the workers, so state they must agree
+# on (disk caches and their counters, rate limits, page stats, the policy marker) lives there.
+DATA_DIR = Path("/data") if Path("/data").exists() else Path(__file__).resolve().parent / "data"
+INDEX_PATH = DATA_DIR / "index.sqlite3"
+INDEXED_PREFIXES = ("snapshots", "metrics", "policy")
+
+# Documents keep their logical ``*.json`` path; compressed formats add a suffix on disk.
+# "json" is the legacy pretty-printed layout, "compact" drops whitespace, "gzip"/"zstd" also compress.
+STORAGE_FORMATS = ("json", "compact", "gzip", "zstd")
+COMPRESSED_SUFFIXES = (".zst", ".gz")
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def resolve_format(fmt: Optional[str] = None) -> str:
+    fmt = (fmt or settings.storage_format).lower()
+    if fmt not in STORAGE_FORMATS:
+        raise ValueError(f"Unknown storage format '{fmt}'; expected one of {', '.join(STORAGE_FORMATS)}")
+    if fmt == "zstd" and _zstd() is None:
+        logger.warning("STORAGE_FORMAT=zstd but the 'zstandard' package is missing; using gzip")
+        return "gzip"
+    return fmt
+
+
+def _encode(payload: Dict[str, Any], fmt: str) -> Tuple[bytes, str]:
+    if fmt == "json":
+        return json.dumps(payload, default=str, indent=2).encode("utf-8"), ""
+    data = json.dumps(payload, default=str, separators=(",", ":")).encode("utf-8")
+    if fmt == "gzip":
+        return gzip.compress(data, compresslevel=6), ".gz"
+    if fmt == "zstd":
+        return _zstd().ZstdCompressor(level=6).compress(data), ".zst"
+    return data, ""
+
+
+def _decode(data: bytes, suffix: str) -> Any:
+    if suffix == ".gz":
+        data = gzip.decompress(data)
+    elif suffix == ".zst":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError("zstandard package required to read .zst documents")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return json.loads(data)
+
+
+def _variants(target: Path) -> List[Tuple[Path, str]]:
+    return [(target.with_name(target.name + suffix), suffix) for suffix in COMPRESSED_SUFFIXES] + [(target, "")]
+
+
+def _logical_path(file: Path) -> str:
+    relative = str(file.relative_to(DATA_DIR))
+    for suffix in COMPRESSED_SUFFIXES:
+        if relative.endswith(suffix):
+            return relative[: -len(suffix)]
+    return relative
+
+
+def iter_documents(prefix: str) -> Iterator[Tuple[str, Path]]:
+    """Yield ``(logical_path, physical_file)`` for every stored document under ``prefix``, any format."""
+    base = DATA_DIR / prefix
+    if not base.exists():
+        return
+    for file in base.rglob("*.json*"):
+        if file.name.startswith(".") or not file.is_file():
+            continue
+        if file.suffix == ".json" or file.suffix in COMPRESSED_SUFFIXES:
+            yield _logical_path(file), file
 
 
 def _ensure_dir(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
+def _fsync_dir(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_many(
+    items: List[Tuple[str, Dict[str, Any]]],
+    fsync: bool = False,
+    fmt: Optional[str] = None,
+    written_at: Optional[int] = None,
+) -> List[str]:
+    """Atomically write each document (temp file + rename); with ``fsync``, sync files and their
+    directories once per batch rather than once per document. ``written_at`` (ns) overrides the
+    index timestamp, for rewrites that must keep a document's place in listings."""
+    fmt = resolve_format(fmt)
+    targets = []
+    for relative_path, payload in items:
+        logical = DATA_DIR / relative_path
+        _ensure_dir(logical)
+        data, suffix = _encode(payload, fmt)
+        target = logical.with_name(logical.name + suffix)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with tmp.open("wb") as handle:
+            handle.write(data)
+            if fsync:
+                handle.flush()
+                os.fsync(handle.fileno())
+        os.replace(tmp, target)
+        # Drop copies in other formats so reads never see a stale version.
+        for variant, _ in _variants(logical):
+            if variant != target:
+                variant.unlink(missing_ok=True)
+        targets.append(target)
+    if fsync:
+        for directory in {target.parent for target in targets}:
+            _fsync_dir(directory)
+    written_at = time.time_ns() if written_at is None else written_at
+    rows = [row for row in (_index_row(path, payload, written_at) for path, payload in items) if row is not None]
+    if rows:
+        _index_rows(rows)
+    return [str(target) for target in targets]
+
+
 def write_json(relative_path: str, payload: Dict[str, Any]) -> str:
-    target = DATA_DIR / relative_path
-    _ensure_dir(target)
-    target.write_text(json.dumps(payload, default=str, indent=2))
-    return str(target)
+    return write_many([(relative_path, payload)])[0]
 
 
 def read_json(relative_path: str) -> Optional[Dict[str, Any]]:
-    target = DATA_DIR / relative_path
-    if not target.exists():
-        return None
-    try:
-        return json.loads(target.read_text())
-    except Exception:
-        return None
+    for candidate, suffix in _variants(DATA_DIR / relative_path):
+        try:
+            return _decode(candidate.read_bytes(), suffix)
+        except FileNotFoundError:
+            continue
+        except Exception:
+            return None
+    return None
 
 
 def list_json(prefix: str) -> List[Dict[str, Any]]:
-    base = DATA_DIR / prefix
-    if not base.exists():
-        return []
     results = []
-    for file in sorted(base.glob("*.json"), reverse=True):
-        data = read_json(str(file.relative_to(DATA_DIR)))
+    for logical, _ in sorted(iter_documents(prefix), reverse=True):
+        data = read_json(logical)
         if data is not None:
             results.append(data)
     return results
+
+
+def migrate_documents(fmt: Optional[str] = None, prefixes: Optional[List[str]] = None) -> int:
+    """Rewrite stored documents in ``fmt`` (default: the configured format); returns files rewritten."""
+    fmt = resolve_format(fmt)
+    _, wanted_suffix = _encode({}, fmt)
+    compact = fmt != "json"
+    migrated = 0
+    for prefix in prefixes or list(INDEXED_PREFIXES) + ["mirror"]:
+        for logical, file in list(iter_documents(prefix)):
+            suffix = file.name[len(Path(logical).name) :]
+            if suffix == wanted_suffix and (suffix or _is_compact(file) == compact):
+                continue
+            data = read_json(logical)
+            if data is None:
+                logger.warning("Skipping unreadable document %s", file)
+                continue
+            # Keep the original timestamps: listings and index rebuilds order documents by them.
+            stat = file.stat()
+            target = write_many([(logical, data)], fmt=fmt, written_at=stat.st_mtime_ns)[0]
+            os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            migrated += 1
+    return migrated
+
+
+def _is_compact(file: Path) -> bool:
+    with file.open("rb") as handle:
+        return b"\n" not in handle.read(4096)
+
+
+# Metadata index: one row per indexed document, maintained on every write_json so listings
+# are keyset-paginated SQLite queries instead of globbing and parsing every file. Rows hold only
+# what listings filter and sort on; document bodies are read from the files.
+
+INDEX_SCHEMA_VERSION = 1
+_index_ready: Optional[Path] = None
+
+
+def _index_connect() -> sqlite3.Connection:
+    global _index_ready
+    _ensure_dir(INDEX_PATH)
+    conn = sqlite3.connect(INDEX_PATH, timeout=10.0, isolation_level=None)
+    if _index_ready != INDEX_PATH:
+        _init_index(conn)
+        _index_ready = INDEX_PATH
+    return conn
+
+
+def _init_index(conn: sqlite3.Connection) -> None:
+    """Create and backfill the schema once per process; concurrent processes serialize on the write
+    lock and only the first one does the work."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < INDEX_SCHEMA_VERSION:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "path TEXT PRIMARY KEY, prefix TEXT NOT NULL, written_at INTEGER NOT NULL, "
+                "company TEXT COLLATE NOCASE, policy_version TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS documents_recent ON documents (prefix, written_at, path)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS documents_company ON documents (prefix, company, written_at, path)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS documents_policy ON documents (prefix, policy_version, written_at, path)"
+            )
+            _upsert_rows(conn, _scan_rows())
+            conn.execute(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _index_row(relative_path: str, payload: Dict[str, Any], written_at: int) -> Optional[Tuple]:
+    prefix = relative_path.split("/", 1)[0]
+    if prefix not in INDEXED_PREFIXES or not isinstance(payload, dict):
+        return None
+    company = payload.get("company")
+    company_name = company.get("name") if isinstance(company, dict) else None
+    policy_version = payload.get("policy_version") or (payload.get("version") if prefix == "policy" else None)
+    return (relative_path, prefix, written_at, company_name, policy_version)
+
+
+def _upsert_rows(conn: sqlite3.Connection, rows: List[Tuple]) -> None:
+    conn.executemany(
+        "INSERT OR REPLACE INTO documents (path, prefix, written_at, company, policy_version) VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
+
+
+def _index_rows(rows: List[Tuple]) -> None:
+    try:
+        conn = _index_connect()
+        try:
+            conn.execute("BEGIN")
+            _upsert_rows(conn, rows)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+    except Exception as exc:
+        logger.warning("Failed to index %s: %s", ", ".join(row[0] for row in rows), exc)
+
+
+def _scan_rows() -> List[Tuple]:
+    rows = []
+    for prefix in INDEXED_PREFIXES:
+        for relative_path, file in iter_documents(prefix):
+            data = read_json(relative_path)
+            row = _index_row(relative_path, data, file.stat().st_mtime_ns) if data is not None else None
+            if row is not None:
+                rows.append(row)
+    return rows
+
+
+def rebuild_index() -> int:
+    conn = _index_connect()
+    try:
+        rows = _scan_rows()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM documents")
+        _upsert_rows(conn, rows)
+        conn.execute("COMMIT")
+        return len(rows)
+    finally:
+        conn.close()
+
+
+def list_indexed(
+    prefix: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    company: Optional[str] = None,
+    policy_version: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Newest-first page of documents under ``prefix`` plus an opaque cursor for the next page."""
+    clauses = ["prefix = ?"]
+    params: List[Any] = [prefix]
+    if company:
+        clauses.append("company = ?")
+        params.append(company)
+    if policy_version:
+        clauses.append("policy_version = ?")
+        params.append(policy_version)
+    if cursor:
+        try:
+            written_at, path = cursor.split(":", 1)
+            params.extend([int(written_at), path])
+        except ValueError:
+            raise ValueError(f"Invalid cursor '{cursor}'")
+        clauses.append("(written_at, path) < (?, ?)")
+    params.append(limit + 1)
+    query = (
+        f"SELECT path, written_at FROM documents WHERE {' AND '.join(clauses)} "
+        "ORDER BY written_at DESC, path DESC LIMIT ?"
+    )
+    conn = _index_connect()
+    try:
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f"{rows[-1][1]}:{rows[-1][0]}"
+    items = []
+    for path, _ in rows:
+        data = read_json(path)
+        if data is None:
+            logger.warning("Indexed document %s is missing or unreadable; run rebuild-index", path)
+            continue
+        items.append(data)
+    return items, next_cursor
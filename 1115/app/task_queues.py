@@ -0,0 +1,28 @@
+from typing import List
+
+from app.config import settings
+
+# Activities are routed by class so slow browsing cannot starve cheap steps and each class can be
+# scaled with its own workers. "default" is the workflow task queue and also runs the cheap activities.
+QUEUE_CLASSES = ("default", "browse", "llm", "persistence")
+
+
+def task_queue_for(queue_class: str) -> str:
+    if queue_class not in QUEUE_CLASSES:
+        raise ValueError(f"Unknown queue class '{queue_class}'; expected one of {', '.join(QUEUE_CLASSES)}")
+    if queue_class == "default":
+        return settings.temporal_task_queue
+    return f"{settings.temporal_task_queue}-{queue_class}"
+
+
+def max_concurrent_activities_for(queue_class: str) -> int:
+    return settings.worker_queue_max_concurrent_activities.get(queue_class, settings.worker_max_concurrent_activities)
+
+
+def parse_queue_classes(value: str) -> List[str]:
+    classes = [part.strip() for part in value.split(",") if part.strip()]
+    if not classes or classes == ["all"]:
+        return list(QUEUE_CLASSES)
+    for queue_class in classes:
+        task_queue_for(queue_class)
+    return classes
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest, start_http_server
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily
+from temporalio import activity
+from temporalio.worker import ActivityInboundInterceptor, ExecuteActivityInput, Interceptor
+
+from app.agent_wall import record_tool_failure
+from app.cache import all_cache_stats
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+ACTIVITY_DURATION = Histogram(
+    "researcher_activity_duration_seconds",
+    "Activity execution time",
+    ["activity", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+ACTIVITY_IN_FLIGHT = Gauge("researcher_activity_in_flight", "Activities currently executing", ["activity"])
+PROVIDER_DURATION = Histogram(
+    "researcher_provider_request_duration_seconds",
+    "Provider HTTP request time until response headers",
+    ["provider"],
+    buckets=LATENCY_BUCKETS,
+)
+PROVIDER_RESPONSES = Counter(
+    "researcher_provider_responses_total", "Provider HTTP responses by status class", ["provider", "status"]
+)
+PROVIDER_FAILURES = Counter(
+    "researcher_provider_failures_total",
+    "Failed provider calls (timeout, transport, throttled, server_error, client_error, rate_limit_timeout)",
+    ["provider", "kind"],
+)
+PROVIDER_IN_FLIGHT = Gauge("researcher_provider_in_flight", "Provider HTTP requests in flight", ["provider"])
+
+
+def current_run_id() -> Optional[str]:
+    return activity.info().workflow_id if activity.in_activity() else None
+
+
+def record_failure(provider: str, kind: str) -> None:
+    """Count a failed provider call globally and against the current workflow run, if any."""
+    PROVIDER_FAILURES.labels(provider, kind).inc()
+    run_id = current_run_id()
+    if run_id:
+        try:
+            record_tool_failure(run_id, provider, kind, activity.info().workflow_run_id)
+        except OSError as exc:
+            logger.warning("Failed to record %s failure for run %s: %s", provider, run_id, exc)
+
+
+def _status_class(status_code: int) -> str:
+    return "429" if status_code == 429 else f"{status_code // 100}xx"
+
+
+def record_response(provider: str, status_code: int, final: bool = True) -> None:
+    """``final`` is False for a 429 that is about to be retried."""
+    PROVIDER_RESPONSES.labels(provider, _status_class(status_code)).inc()
+    if final and status_code >= 400:
+        if status_code == 429:
+            record_failure(provider, "throttled")
+        else:
+            record_failure(provider, "server_error" if status_code >= 500 else "client_error")
+
+
+@contextmanager
+def provider_call(provider: str) -> Iterator[None]:
+    PROVIDER_IN_FLIGHT.labels(provider).inc()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as exc:
+        record_failure(provider, "timeout" if isinstance(exc, httpx.TimeoutException) else "transport")
+        raise
+    finally:
+        PROVIDER_DURATION.labels(provider).observe(time.perf_counter() - started)
+        PROVIDER_IN_FLIGHT.labels(provider).dec()
+
+
+def activities_in_flight() -> int:
+    return int(sum(sample.value for metric in ACTIVITY_IN_FLIGHT.collect() for sample in metric.samples))
+
+
+class _ActivityMetrics(ActivityInboundInterceptor):
+    async def execute_activity(self, input: ExecuteActivityInput) -> Any:
+        name = activity.info().activity_type
+        ACTIVITY_IN_FLIGHT.labels(name).inc()
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await super().execute_activity(input)
+            outcome = "ok"
+            return result
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            ACTIVITY_DURATION.labels(name, outcome).observe(time.perf_counter() - started)
+            ACTIVITY_IN_FLIGHT.labels(name).dec()
+
+
+class ActivityMetricsInterceptor(Interceptor):
+    """Worker interceptor recording latency, outcome and concurrency for every activity."""
+
+    def intercept_activity(self, next: ActivityInboundInterceptor) -> ActivityInboundInterceptor:
+        return _ActivityMetrics(next)
+
+
+class _CacheCollector:
+    """Reads cache counters at scrape time. Disk cache counters are shared by every process on the
+    host, so only one process (the API) exports them; the others export their in-process caches."""
+
+    def __init__(self, include_shared: bool) -> None:
+        self.include_shared = include_shared
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        # Counter families are exposed with a _total suffix: researcher_cache_hits_total etc.
+        hits = CounterMetricFamily("researcher_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("researcher_cache_misses", "Cache misses", labels=["cache"])
+        ratio = GaugeMetricFamily("researcher_cache_hit_ratio", "Cache hit ratio", labels=["cache"])
+        for name, stats in all_cache_stats(self.include_shared).items():
+            if "error" in stats:
+                continue
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            ratio.add_metric([name], stats["hit_ratio"])
+        yield hits
+        yield misses
+        yield ratio
+
+
+_cache_collector: Optional[_CacheCollector] = None
+
+
+def register_cache_metrics(include_shared: bool) -> None:
+    global _cache_collector
+    if _cache_collector is not None:
+        return
+    _cache_collector = _CacheCollector(include_shared)
+    REGISTRY.register(_cache_collector)
+
+
+def render_latest() -> bytes:
+    return generate_latest(REGISTRY)
+
+
+def start_metrics_server(port: int) -> None:
+    start_http_server(port)
+    logger.info("Serving Prometheus metrics on :%s/metrics", port)
+
@@ -1,46 +1,307 @@
+import argparse
 import asyncio
+import json
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
 
 from temporalio.client import Client
 from temporalio.worker import Worker
 
-from app import activities
+from app import activities, telemetry
+from app.clients import http_pool
 from app.config import settings
-from app.workflows import ResearchCompanyWorkflow, SelfLearningWorkflow
+from app.task_queues import max_concurrent_activities_for, parse_queue_classes, task_queue_for
+from app.workflows import BulkResearchWorkflow, ResearchCompanyWorkflow, SelfLearningWorkflow
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+STATUS_INTERVAL_SECONDS = 5.0
+MAX_RESTART_BACKOFF_SECONDS = 30.0
 
-async def run_worker() -> None:
-    client = await Client.connect(settings.temporal_address, namespace=settings.temporal_namespace)
-    executor = ThreadPoolExecutor(max_workers=settings.worker_max_concurrency)
-    worker = Worker(
+
+QUEUE_ACTIVITIES = {
+    "default": [
+        activities.load_policy,
+        activities.fetch_company_data_from_linkup,
+        activities.fetch_freepik_visual,
+    ],
+    "browse": [activities.browse_and_extract_pages],
+    "llm": [activities.build_snapshot_with_claude, activities.propose_new_policy_with_claude],
+    "persistence": [
+        activities.write_snapshot_to_memory,
+        activities.log_run_metrics,
+        activities.fetch_recent_metrics_from_memory,
+        activities.save_new_policy,
+        activities.load_previous_snapshot,
+    ],
+}
+
+
+def build_worker(client: Client, queue_class: str) -> Worker:
+    # Every activity is async, so no activity executor: each process runs them on its own event loop.
+    is_default = queue_class == "default"
+    return Worker(
         client,
-        task_queue=settings.temporal_task_queue,
-        workflows=[ResearchCompanyWorkflow, SelfLearningWorkflow],
-        activities=[
-            activities.load_policy,
-            activities.fetch_company_data_from_linkup,
-            activities.browse_and_extract_pages,
-            activities.build_snapshot_with_claude,
-            activities.attach_freepik_visual,
-            activities.write_snapshot_to_memory,
-            activities.log_run_metrics,
-            activities.fetch_recent_metrics_from_memory,
-            activities.propose_new_policy_with_claude,
-            activities.save_new_policy,
-        ],
-        activity_executor=executor,
+        task_queue=task_queue_for(queue_class),
+        workflows=[ResearchCompanyWorkflow, SelfLearningWorkflow, BulkResearchWorkflow] if is_default else [],
+        activities=QUEUE_ACTIVITIES[queue_class],
+        max_concurrent_activities=max_concurrent_activities_for(queue_class),
+        max_concurrent_workflow_tasks=settings.worker_max_concurrent_workflow_tasks if is_default else None,
+        graceful_shutdown_timeout=timedelta(seconds=settings.worker_graceful_shutdown_seconds),
+        interceptors=[telemetry.ActivityMetricsInterceptor()],
     )
+
+
+def _report(status_queue: Optional[Any], index: int, state: str, queues: Optional[List[str]] = None) -> None:
+    if status_queue is None:
+        return
+    try:
+        status_queue.put_nowait(
+            {
+                "index": index,
+                "pid": os.getpid(),
+                "state": state,
+                "queues": queues or [],
+                "activities_in_flight": telemetry.activities_in_flight(),
+                "reported_at": time.time(),
+            }
+        )
+    except Exception as exc:
+        logger.debug("Worker %s status report failed: %s", index, exc)
+
+
+async def _report_periodically(status_queue: Any, index: int, queues: List[str]) -> None:
+    while True:
+        _report(status_queue, index, "running", queues)
+        await asyncio.sleep(STATUS_INTERVAL_SECONDS)
+
+
+async def run_worker(queues: List[str], index: int = 0, status_queue: Optional[Any] = None) -> None:
+    client = await Client.connect(settings.temporal_address, namespace=settings.temporal_namespace)
+    workers = [build_worker(client, queue_class) for queue_class in queues]
+
+    draining = False
+
+    def drain() -> None:
+        nonlocal draining
+        if draining:
+            return
+        draining = True
+        logger.info(
+            "Worker %s draining: finishing in-flight activities (up to %ss)",
+            index,
+            settings.worker_graceful_shutdown_seconds,
+        )
+        _report(status_queue, index, "draining", queues)
+        for worker in workers:
+            asyncio.ensure_future(worker.shutdown())
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, drain)
+
+    if settings.worker_metrics_port:
+        telemetry.register_cache_metrics(include_shared=False)
+        telemetry.start_metrics_server(settings.worker_metrics_port + index)
+    await http_pool.open_clients()
+    reporter = asyncio.ensure_future(_report_periodically(status_queue, index, queues)) if status_queue else None
     logger.info(
-        "Worker started on queue '%s' with max %s activities",
-        settings.temporal_task_queue,
-        settings.worker_max_concurrency,
+        "Worker %s (pid %s) started on %s",
+        index,
+        os.getpid(),
+        ", ".join(f"'{task_queue_for(q)}' (max {max_concurrent_activities_for(q)} activities)" for q in queues),
+    )
+    try:
+        await asyncio.gather(*(worker.run() for worker in workers))
+    finally:
+        if reporter:
+            reporter.cancel()
+        await http_pool.close_clients()
+        _report(status_queue, index, "stopped", queues)
+        logger.info("Worker %s stopped", index)
+
+
+def _child_main(queues: List[str], index: int, status_queue: Any) -> None:
+    # The supervisor owns Ctrl-C handling until the child's event loop installs its own.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(run_worker(queues, index, status_queue))
+
+
+class Supervisor:
+    """Runs N worker processes, restarts crashed ones with backoff, drains them on SIGTERM and
+    reports their combined health over HTTP."""
+
+    def __init__(self, processes: int, queues: List[str]) -> None:
+        self.processes = processes
+        self.queues = queues
+        self._ctx = multiprocessing.get_context("spawn")
+        self._status_queue = self._ctx.Queue()
+        self._children: Dict[int, multiprocessing.process.BaseProcess] = {}
+        self._status: Dict[int, Dict[str, Any]] = {}
+        self._restarts: Dict[int, int] = {}
+        self._restart_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._draining = False
+        self._drain_deadline = 0.0
+
+    def _spawn(self, index: int) -> None:
+        process = self._ctx.Process(
+            target=_child_main, args=(self.queues, index, self._status_queue), name=f"worker-{index}"
+        )
+        process.start()
+        with self._lock:
+            self._children[index] = process
+            self._status[index] = {"index": index, "pid": process.pid, "state": "starting", "reported_at": time.time()}
+        logger.info("Started worker %s (pid %s)", index, process.pid)
+
+    def _drain(self, signum: int, frame: Any) -> None:
+        if self._draining:
+            return
+        self._draining = True
+        self._drain_deadline = time.monotonic() + settings.worker_graceful_shutdown_seconds + 10
+        logger.info("Supervisor received signal %s; draining %s workers", signum, len(self._children))
+        for process in self._children.values():
+            if process.is_alive():
+                process.terminate()  # SIGTERM: the worker finishes in-flight activities and exits
+
+    def health(self) -> Dict[str, Any]:
+        now = time.time()
+        workers = []
+        with self._lock:
+            for index in sorted(self._children):
+                process = self._children[index]
+                status = dict(self._status.get(index, {}))
+                status["alive"] = process.is_alive()
+                status["restarts"] = self._restarts.get(index, 0)
+                status["stale"] = now - status.get("reported_at", 0) > 3 * STATUS_INTERVAL_SECONDS
+                if settings.worker_metrics_port:
+                    status["metrics_port"] = settings.worker_metrics_port + index
+                workers.append(status)
+        healthy = not self._draining and all(
+            w["alive"] and w.get("state") == "running" and not w["stale"] for w in workers
+        )
+        return {
+            "status": "draining" if self._draining else ("ok" if healthy else "degraded"),
+            "healthy": healthy,
+            "processes": self.processes,
+            "queues": [task_queue_for(q) for q in self.queues],
+            "running": sum(1 for w in workers if w["alive"] and w.get("state") == "running"),
+            "activities_in_flight": sum(w.get("activities_in_flight", 0) for w in workers if w["alive"]),
+            "workers": workers,
+        }
+
+    def _serve_health(self) -> Optional[ThreadingHTTPServer]:
+        if not settings.worker_health_port:
+            return None
+        supervisor = self
+
+        class HealthHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.rstrip("/") not in ("", "/health"):
+                    self.send_error(404)
+                    return
+                report = supervisor.health()
+                body = json.dumps(report).encode("utf-8")
+                self.send_response(200 if report["healthy"] else 503)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return
+
+        server = ThreadingHTTPServer(("0.0.0.0", settings.worker_health_port), HealthHandler)
+        threading.Thread(target=server.serve_forever, name="worker-health", daemon=True).start()
+        logger.info("Supervisor health on :%s/health", settings.worker_health_port)
+        return server
+
+    def _collect_status(self) -> None:
+        try:
+            while True:
+                status = self._status_queue.get(timeout=1.0)
+                with self._lock:
+                    self._status[status["index"]] = status
+        except queue.Empty:
+            return
+
+    def _check_children(self) -> None:
+        now = time.monotonic()
+        for index, process in list(self._children.items()):
+            if process.is_alive() or self._draining:
+                continue
+            if index not in self._restart_at:
+                restarts = self._restarts.get(index, 0)
+                delay = min(2.0**restarts, MAX_RESTART_BACKOFF_SECONDS)
+                logger.warning(
+                    "Worker %s (pid %s) exited with %s; restarting in %.0fs", index, process.pid, process.exitcode, delay
+                )
+                self._restart_at[index] = now + delay
+            elif now >= self._restart_at[index]:
+                del self._restart_at[index]
+                self._restarts[index] = self._restarts.get(index, 0) + 1
+                self._spawn(index)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._drain)
+        signal.signal(signal.SIGINT, self._drain)
+        server = self._serve_health()
+        for index in range(self.processes):
+            self._spawn(index)
+        try:
+            while True:
+                self._collect_status()
+                self._check_children()
+                if self._draining:
+                    alive = [p for p in self._children.values() if p.is_alive()]
+                    if not alive:
+                        break
+                    if time.monotonic() > self._drain_deadline:
+                        logger.warning("Drain deadline passed; killing %s workers", len(alive))
+                        for process in alive:
+                            process.kill()
+                        break
+        finally:
+            for process in self._children.values():
+                process.join(timeout=5)
+            if server:
+                server.shutdown()
+        logger.info("Supervisor stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description="Run Temporal worker processes")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=settings.worker_processes,
+        help="Worker processes to supervise (default: WORKER_PROCESSES, 0 = one per CPU core; 1 runs inline)",
+    )
+    parser.add_argument(
+        "--queues",
+        default=settings.worker_queues,
+        help="Comma-separated queue classes to serve: default, browse, llm, persistence (default: WORKER_QUEUES)",
     )
-    await worker.run()
+    args = parser.parse_args()
+    try:
+        queues = parse_queue_classes(args.queues)
+    except ValueError as exc:
+        parser.error(str(exc))
+    processes = args.processes or os.cpu_count() or 1
+    if processes == 1:
+        asyncio.run(run_worker(queues))
+    else:
+        Supervisor(processes, queues).run()
 
 
 if __name__ == "__main__":
-    asyncio.run(run_worker())
+    main()
@@ -1,60 +1,160 @@
+import asyncio
 from datetime import timedelta
-from typing import List
+from typing import Any, Awaitable, Dict, List, Optional
 
 from temporalio import workflow
+from temporalio.common import RetryPolicy
 
-from app.activities import (
-    attach_freepik_visual,
-    browse_and_extract_pages,
-    build_snapshot_with_claude,
-    fetch_company_data_from_linkup,
-    fetch_recent_metrics_from_memory,
-    load_policy,
-    log_run_metrics,
-    propose_new_policy_with_claude,
-    save_new_policy,
-    write_snapshot_to_memory,
-)
-from app.config import settings
-from app.models import CompanyInput
+# Activities pull in HTTP clients, settings and storage; pass them through the sandbox
+# rather than re-importing them for every workflow run.
+with workflow.unsafe.imports_passed_through():
+    from app.activities import (
+        browse_and_extract_pages,
+        build_snapshot_with_claude,
+        fetch_company_data_from_linkup,
+        fetch_freepik_visual,
+        fetch_recent_metrics_from_memory,
+        load_policy,
+        load_previous_snapshot,
+        log_run_metrics,
+        propose_new_policy_with_claude,
+        save_new_policy,
+        write_snapshot_to_memory,
+    )
+    from app.config import settings
+    from app.incremental import has_material_change, reusable_pages
+    from app.models import (
+        BulkResearchInput,
+        BulkResearchProgress,
+        CompanyInput,
+        CompanySnapshot,
+        ResearchRunResult,
+    )
+    from app.task_queues import task_queue_for
 
 
+# Workflow code is not versioned with workflow.patched(): a change to the command sequence
+# breaks replay of runs started on older code, so drain in-flight runs before deploying one.
 @workflow.defn
 class ResearchCompanyWorkflow:
-    @workflow.run
-    async def run(self, company: CompanyInput) -> str:
-        policy = await workflow.execute_activity(
-            load_policy, schedule_to_close_timeout=timedelta(seconds=10)
-        )
-        linkup_results = await workflow.execute_activity(
-            fetch_company_data_from_linkup, company, policy, schedule_to_close_timeout=timedelta(seconds=30)
+    def __init__(self) -> None:
+        self._timings: Dict[str, float] = {}
+
+    async def _timed(self, stage: str, step: Awaitable[Any]) -> Any:
+        started = workflow.now()
+        try:
+            return await step
+        finally:
+            self._timings[stage] = (workflow.now() - started).total_seconds()
+
+    async def _fetch_visual(self, company: CompanyInput) -> Optional[str]:
+        try:
+            return await workflow.execute_activity(
+                fetch_freepik_visual, company.name, schedule_to_close_timeout=timedelta(seconds=20)
+            )
+        except Exception as exc:
+            # The visual is decorative; a failed lookup should not fail the research run.
+            workflow.logger.warning("Freepik lookup failed for %s: %s", company.name, exc)
+            return None
+
+    async def _load_previous(self, company: CompanyInput) -> Optional[CompanySnapshot]:
+        return await self._timed(
+            "load_previous_snapshot",
+            workflow.execute_activity(
+                load_previous_snapshot,
+                company,
+                task_queue=task_queue_for("persistence"),
+                schedule_to_close_timeout=timedelta(seconds=10),
+            ),
         )
-        page_extractions = await workflow.execute_activity(
-            browse_and_extract_pages,
-            company,
-            policy,
-            linkup_results,
-            workflow.info().workflow_id,
-            schedule_to_close_timeout=timedelta(minutes=5),
+
+    @workflow.run
+    async def run(self, company: CompanyInput, incremental: bool = False) -> ResearchRunResult:
+        # Stage graph: the Freepik lookup only needs the company name, so it runs alongside
+        # policy -> Linkup -> browsing -> brief; persistence and metrics run side by side at the end.
+        # Incremental runs also load the previous snapshot up front, reuse its pages for unchanged
+        # Linkup results, and keep its brief when nothing material changed.
+        started = workflow.now()
+        visual = asyncio.create_task(self._timed("fetch_freepik_visual", self._fetch_visual(company)))
+        previous_task = asyncio.create_task(self._load_previous(company)) if incremental else None
+
+        policy = await self._timed(
+            "load_policy",
+            workflow.execute_activity(load_policy, schedule_to_close_timeout=timedelta(seconds=10)),
         )
-        snapshot = await workflow.execute_activity(
-            build_snapshot_with_claude,
-            company,
-            policy,
-            linkup_results,
-            page_extractions,
-            schedule_to_close_timeout=timedelta(seconds=90),
+        linkup_results = await self._timed(
+            "fetch_company_data_from_linkup",
+            workflow.execute_activity(
+                fetch_company_data_from_linkup,
+                args=[company, policy],
+                schedule_to_close_timeout=timedelta(seconds=30),
+            ),
         )
-        snapshot_with_visual = await workflow.execute_activity(
-            attach_freepik_visual, snapshot, schedule_to_close_timeout=timedelta(seconds=20)
+        previous = await previous_task if previous_task else None
+        reuse_pages = reusable_pages(previous, linkup_results)
+        page_extractions = await self._timed(
+            "browse_and_extract_pages",
+            workflow.execute_activity(
+                browse_and_extract_pages,
+                args=[company, policy, linkup_results, workflow.info().workflow_id, reuse_pages],
+                task_queue=task_queue_for("browse"),
+                schedule_to_close_timeout=timedelta(minutes=5),
+                start_to_close_timeout=timedelta(seconds=settings.browse_attempt_timeout_seconds),
+                heartbeat_timeout=timedelta(seconds=settings.browse_heartbeat_timeout_seconds),
+                retry_policy=RetryPolicy(maximum_attempts=settings.browse_max_attempts),
+            ),
         )
-        snapshot_id = await workflow.execute_activity(
-            write_snapshot_to_memory, snapshot_with_visual, schedule_to_close_timeout=timedelta(seconds=20)
+        brief_reused = previous is not None and not has_material_change(previous, linkup_results, page_extractions)
+        if brief_reused:
+            snapshot = previous.model_copy(
+                update={
+                    "snapshot_id": str(workflow.uuid4()),
+                    "company": company,
+                    "created_at": workflow.now().replace(tzinfo=None),
+                    "policy_version": policy.version,
+                    "linkup_results": linkup_results,
+                    "pages": page_extractions,
+                }
+            )
+        else:
+            snapshot = await self._timed(
+                "build_snapshot_with_claude",
+                workflow.execute_activity(
+                    build_snapshot_with_claude,
+                    args=[company, policy, linkup_results, page_extractions, workflow.info().workflow_id],
+                    task_queue=task_queue_for("llm"),
+                    schedule_to_close_timeout=timedelta(seconds=90),
+                ),
+            )
+        snapshot.freepik_asset_url = await visual
+
+        snapshot_id, _ = await asyncio.gather(
+            self._timed(
+                "write_snapshot_to_memory",
+                workflow.execute_activity(
+                    write_snapshot_to_memory,
+                    snapshot,
+                    task_queue=task_queue_for("persistence"),
+                    schedule_to_close_timeout=timedelta(seconds=20),
+                ),
+            ),
+            self._timed(
+                "log_run_metrics",
+                workflow.execute_activity(
+                    log_run_metrics,
+                    snapshot,
+                    task_queue=task_queue_for("persistence"),
+                    schedule_to_close_timeout=timedelta(seconds=10),
+                ),
+            ),
         )
-        await workflow.execute_activity(
-            log_run_metrics, snapshot_with_visual, schedule_to_close_timeout=timedelta(seconds=10)
+        self._timings["total"] = (workflow.now() - started).total_seconds()
+        return ResearchRunResult(
+            snapshot_id=snapshot_id,
+            stage_timings=self._timings,
+            reused_pages=sum(1 for page in page_extractions if page in reuse_pages),
+            brief_reused=brief_reused,
         )
-        return snapshot_id
 
 
 @workflow.defn
@@ -62,18 +162,91 @@ class SelfLearningWorkflow:
     @workflow.run
     async def run(self) -> str:
         recent_metrics = await workflow.execute_activity(
-            fetch_recent_metrics_from_memory, schedule_to_close_timeout=timedelta(seconds=30)
+            fetch_recent_metrics_from_memory,
+            task_queue=task_queue_for("persistence"),
+            schedule_to_close_timeout=timedelta(seconds=30),
         )
         current_policy = await workflow.execute_activity(
             load_policy, schedule_to_close_timeout=timedelta(seconds=10)
         )
         new_policy = await workflow.execute_activity(
             propose_new_policy_with_claude,
-            current_policy,
-            recent_metrics,
+            args=[current_policy, recent_metrics],
+            task_queue=task_queue_for("llm"),
             schedule_to_close_timeout=timedelta(seconds=90),
         )
         new_version = await workflow.execute_activity(
-            save_new_policy, new_policy, schedule_to_close_timeout=timedelta(seconds=15)
+            save_new_policy,
+            new_policy,
+            task_queue=task_queue_for("persistence"),
+            schedule_to_close_timeout=timedelta(seconds=15),
         )
         return new_version
+
+
+@workflow.defn
+class BulkResearchWorkflow:
+    def __init__(self) -> None:
+        self._batch: Optional[BulkResearchInput] = None
+        self._pending = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+
+    @workflow.query
+    def progress(self) -> BulkResearchProgress:
+        return BulkResearchProgress(
+            batch_id=self._batch.batch_id if self._batch else "",
+            total=self._batch.total if self._batch else 0,
+            completed=self._completed,
+            failed=self._failed,
+            in_flight=self._in_flight,
+            pending=self._pending,
+        )
+
+    async def _research_child(self, index: int, company: CompanyInput) -> None:
+        try:
+            await workflow.execute_child_workflow(
+                ResearchCompanyWorkflow.run,
+                args=[company, self._batch.incremental],
+                id=f"{workflow.info().workflow_id}-{index}",
+                execution_timeout=timedelta(seconds=self._batch.child_timeout_seconds),
+            )
+            self._completed += 1
+        except Exception as exc:
+            workflow.logger.warning("Bulk child %s (%s) failed: %s", index, company.name, exc)
+            self._failed += 1
+        finally:
+            self._in_flight -= 1
+
+    @workflow.run
+    async def run(self, batch: BulkResearchInput) -> BulkResearchProgress:
+        self._batch = batch
+        self._completed = batch.completed
+        self._failed = batch.failed
+        concurrency = max(batch.concurrency, 1)
+        # Bound history size: start at most continue_as_new_every children per run, then hand
+        # the remaining companies to a fresh run with the counters carried over.
+        this_run = batch.companies[: batch.continue_as_new_every]
+        remaining = batch.companies[batch.continue_as_new_every :]
+        self._pending = len(batch.companies)
+
+        for offset, company in enumerate(this_run):
+            await workflow.wait_condition(lambda: self._in_flight < concurrency)
+            self._pending -= 1
+            self._in_flight += 1
+            asyncio.create_task(self._research_child(batch.next_index + offset, company))
+        await workflow.wait_condition(lambda: self._in_flight == 0)
+
+        if remaining:
+            workflow.continue_as_new(
+                batch.model_copy(
+                    update={
+                        "companies": remaining,
+                        "next_index": batch.next_index + len(this_run),
+                        "completed": self._completed,
+                        "failed": self._failed,
+                    }
+                )
+            )
+        return self.progress()
@@ -0,0 +1 @@
+# Offline benchmark harness: fake provider servers and a Temporal load driver
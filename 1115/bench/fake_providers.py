@@ -0,0 +1,289 @@
+"""Local stand-ins for Linkup, Browser Use, Anthropic, SmartBuckets and Freepik.
+
+Every provider is mounted under its own prefix on one server, so the worker is pointed at it
+with the regular ``*_BASE_URL`` settings (``--print-env`` prints them). Each provider samples
+latency from a log-normal distribution fitted to a median/p95 and injects 5xx errors and 429s
+(with ``Retry-After``) at configurable rates.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+from collections import defaultdict
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+PROVIDERS = ("linkup", "browser_use", "anthropic", "smartbuckets", "freepik")
+
+
+@dataclass
+class ProviderProfile:
+    median_ms: float
+    p95_ms: float
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after_seconds: float = 1.0
+
+    def sample_seconds(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        mu = math.log(self.median_ms)
+        sigma = max(math.log(max(self.p95_ms, self.median_ms)) - mu, 0.0) / 1.645
+        return random.lognormvariate(mu, sigma) / 1000.0
+
+
+DEFAULT_PROFILES: Dict[str, ProviderProfile] = {
+    "linkup": ProviderProfile(median_ms=400, p95_ms=1200),
+    "browser_use": ProviderProfile(median_ms=4000, p95_ms=12000),
+    "anthropic": ProviderProfile(median_ms=3000, p95_ms=8000),
+    "smartbuckets": ProviderProfile(median_ms=80, p95_ms=300),
+    "freepik": ProviderProfile(median_ms=300, p95_ms=900),
+}
+
+PAGE_PATHS = ("/about", "/pricing", "/solutions", "/product", "/customers", "/blog", "/careers", "/docs")
+WORDS = "pipeline revenue platform workflow integration security analytics onboarding compliance scale".split()
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "acme"
+
+
+def _text(words: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+class FakeProviders:
+    def __init__(self, profiles: Dict[str, ProviderProfile]) -> None:
+        self.profiles = profiles
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self.object_order: List[str] = []
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def gate(self, provider: str, delay: bool = True) -> Optional[Response]:
+        """Apply latency and fault injection; returns an error response to send instead, if any."""
+        profile = self.profiles[provider]
+        self.stats[provider]["requests"] += 1
+        roll = random.random()
+        if roll < profile.throttle_rate:
+            self.stats[provider]["throttled"] += 1
+            return JSONResponse(
+                {"error": "rate_limited"},
+                status_code=429,
+                headers={"Retry-After": f"{profile.retry_after_seconds:g}"},
+            )
+        if delay:
+            await asyncio.sleep(profile.sample_seconds())
+        if roll < profile.throttle_rate + profile.error_rate:
+            self.stats[provider]["errors"] += 1
+            return JSONResponse({"error": "injected failure"}, status_code=503)
+        return None
+
+    def fake_json(self, schema: Dict[str, Any], prompt: str) -> Any:
+        kind = schema.get("type")
+        if kind == "object":
+            return {key: self.fake_json(sub, prompt) for key, sub in (schema.get("properties") or {}).items()}
+        if kind == "array":
+            items = schema.get("items") or {"type": "string"}
+            if "slot" in (items.get("properties") or {}):
+                slots = sorted({int(s) for s in re.findall(r'"slot":\s*(\d+)', prompt)})
+                return [{**self.fake_json(items, prompt), "slot": slot} for slot in slots]
+            return [self.fake_json(items, prompt) for _ in range(3)]
+        if kind == "number":
+            return round(random.random(), 3)
+        if kind == "integer":
+            return random.randint(1, 6)
+        if kind == "boolean":
+            return random.random() < 0.5
+        return _text(40)
+
+    def build_app(self) -> FastAPI:
+        app = FastAPI(title="Fake providers")
+
+        @app.get("/_stats")
+        async def stats() -> dict:
+            return {"stats": self.stats, "profiles": {name: asdict(p) for name, p in self.profiles.items()}}
+
+        @app.get("/linkup/v1/search")
+        async def linkup_search(q: str = "", limit: int = 10) -> Response:
+            error = await self.gate("linkup")
+            if error:
+                return error
+            # The default query template is "research {company_name} {domain} ..."
+            words = q.split()
+            slug = _slug(words[1] if len(words) > 1 else "acme")
+            results = [
+                {
+                    "title": f"{slug} {path.strip('/')}",
+                    "url": f"https://{slug}.example.com{path}",
+                    "snippet": _text(25),
+                    "source": "linkup",
+                }
+                for path in random.sample(PAGE_PATHS, k=min(limit, len(PAGE_PATHS)))
+            ]
+            return JSONResponse({"results": results})
+
+        @app.post("/browser_use/v1/browse")
+        async def browser_use_browse(request: Request) -> Response:
+            error = await self.gate("browser_use")
+            if error:
+                return error
+            body = await request.json()
+            path = re.sub(r"^https?://[^/]+", "", body.get("url", "")) or "/"
+            return JSONResponse(
+                {
+                    "page_type": path.strip("/").split("/")[0] or "home",
+                    "icp": _text(8),
+                    "product_lines": [_text(3) for _ in range(3)],
+                    "pain_points": [_text(6) for _ in range(2)],
+                    "signals": [_text(6) for _ in range(2)],
+                    "raw_text_excerpt": _text(150),
+                }
+            )
+
+        @app.post("/anthropic/v1/messages")
+        async def anthropic_messages(request: Request) -> Response:
+            body = await request.json()
+            prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+            schema = ((body.get("extra_body") or {}).get("response_format") or {}).get("schema") or {}
+            text = json.dumps(self.fake_json(schema, prompt))
+            if not body.get("stream"):
+                error = await self.gate("anthropic")
+                if error:
+                    return error
+                return JSONResponse({"content": [{"type": "text", "text": text}]})
+
+            # Streaming: the sampled latency covers the whole generation, a fifth of it before the first token.
+            error = await self.gate("anthropic", delay=False)
+            if error:
+                return error
+            total = self.profiles["anthropic"].sample_seconds()
+            chunks = [text[i : i + 24] for i in range(0, len(text), 24)] or [""]
+
+            async def events():
+                await asyncio.sleep(total / 5)
+                yield 'event: message_start\ndata: {"type":"message_start"}\n\n'
+                for chunk in chunks:
+                    await asyncio.sleep(total * 0.8 / len(chunks))
+                    delta = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}}
+                    yield f"event: content_block_delta\ndata: {json.dumps(delta)}\n\n"
+                yield 'event: message_stop\ndata: {"type":"message_stop"}\n\n'
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        @app.post("/smartbuckets/upload")
+        async def smartbuckets_upload(request: Request) -> Response:
+            error = await self.gate("smartbuckets")
+            if error:
+                return error
+            body = await request.json()
+            path = body.get("path", "")
+            if path not in self.objects:
+                self.object_order.append(path)
+            self.objects[path] = body.get("data")
+            return JSONResponse({"path": path})
+
+        @app.get("/smartbuckets/objects")
+        async def smartbuckets_objects(prefix: str = "", limit: int = 100) -> Response:
+            error = await self.gate("smartbuckets")
+            if error:
+                return error
+            newest = [p for p in reversed(self.object_order) if p.startswith(prefix)][:limit]
+            return JSONResponse({"objects": [{"path": p} for p in newest]})
+
+        @app.get("/smartbuckets/download")
+        async def smartbuckets_download(path: str) -> Response:
+            error = await self.gate("smartbuckets")
+            if error:
+                return error
+            if path not in self.objects:
+                return JSONResponse({"error": "not found"}, status_code=404)
+            return JSONResponse(self.objects[path])
+
+        @app.get("/freepik")
+        async def freepik_search(q: str = "") -> Response:
+            error = await self.gate("freepik")
+            if error:
+                return error
+            slug = _slug(q)
+            return JSONResponse({"data": [{"images": {"preview": f"https://img.example.com/{slug}.jpg"}}]})
+
+        return app
+
+
+def load_profiles(args: argparse.Namespace) -> Dict[str, ProviderProfile]:
+    profiles = {name: ProviderProfile(**asdict(p)) for name, p in DEFAULT_PROFILES.items()}
+    if args.profile:
+        with open(args.profile) as handle:
+            overrides = json.load(handle)
+        known = {f.name for f in fields(ProviderProfile)}
+        for name, values in overrides.items():
+            if name not in profiles:
+                raise SystemExit(f"Unknown provider '{name}' in {args.profile}; expected one of {', '.join(PROVIDERS)}")
+            for key, value in values.items():
+                if key not in known:
+                    raise SystemExit(f"Unknown profile field '{key}' for {name}")
+                setattr(profiles[name], key, value)
+    for profile in profiles.values():
+        profile.median_ms *= args.latency_scale
+        profile.p95_ms *= args.latency_scale
+        if args.error_rate is not None:
+            profile.error_rate = args.error_rate
+        if args.throttle_rate is not None:
+            profile.throttle_rate = args.throttle_rate
+    return profiles
+
+
+def provider_env(base_url: str) -> Dict[str, str]:
+    base_url = base_url.rstrip("/")
+    return {
+        "LINKUP_BASE_URL": f"{base_url}/linkup",
+        "BROWSER_USE_BASE_URL": f"{base_url}/browser_use",
+        "ANTHROPIC_BASE_URL": f"{base_url}/anthropic",
+        "SMARTBUCKETS_BASE_URL": f"{base_url}/smartbuckets",
+        "FREEPIC_BASE_URL": f"{base_url}/freepik",
+        # Clients skip providers without a key, so the fakes need placeholder credentials.
+        "LINKUP_API_KEY": "bench",
+        "BROWSER_USE_API_KEY": "bench",
+        "ANTHROPIC_API_KEY": "bench",
+        "LIQUID_METAL_API_KEY": "bench",
+        "FREEPIC_API_KEY": "bench",
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.fake_providers", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument(
+        "--profile", help='JSON file of per-provider overrides, e.g. {"anthropic": {"median_ms": 800, "throttle_rate": 0.1}}'
+    )
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiply every latency (0 disables sleeps)")
+    parser.add_argument("--error-rate", type=float, default=None, help="Override the 5xx rate for every provider")
+    parser.add_argument("--throttle-rate", type=float, default=None, help="Override the 429 rate for every provider")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--print-env", action="store_true", help="Print worker environment variables and exit")
+    args = parser.parse_args()
+
+    env = provider_env(f"http://{args.host}:{args.port}")
+    if args.print_env:
+        for key, value in env.items():
+            print(f"export {key}={value}")
+        return
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    import uvicorn
+
+    print(f"Fake providers on http://{args.host}:{args.port}; point the worker at them with:")
+    for key, value in env.items():
+        print(f"  {key}={value}")
+    uvicorn.run(FakeProviders(load_profiles(args)).build_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
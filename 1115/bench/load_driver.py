@@ -0,0 +1,128 @@
+"""Run N concurrent ResearchCompanyWorkflows against a Temporal server and report throughput
+and per-activity latency percentiles (from each run's ``stage_timings``)."""
+import argparse
+import asyncio
+import json
+import math
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+from temporalio.client import Client
+
+from app.config import settings
+from app.models import CompanyInput, ResearchRunResult
+from app.workflows import ResearchCompanyWorkflow
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+async def _run_one(
+    client: Client, index: int, prefix: str, limit: asyncio.Semaphore
+) -> Optional[ResearchRunResult]:
+    # Unique company names keep the LLM/extraction caches from short-circuiting the providers.
+    company = CompanyInput(name=f"benchco{prefix}{index}", domain=f"benchco{prefix}{index}.example.com")
+    async with limit:
+        started = time.monotonic()
+        try:
+            result = await client.execute_workflow(
+                ResearchCompanyWorkflow.run,
+                company,
+                id=f"bench-{prefix}-{index}",
+                task_queue=settings.temporal_task_queue,
+            )
+        except Exception as exc:
+            print(f"run {index} failed after {time.monotonic() - started:.1f}s: {exc}")
+            return None
+    if isinstance(result, dict):
+        result = ResearchRunResult(**result)
+    return result
+
+
+def _report(results: List[Optional[ResearchRunResult]], elapsed: float) -> Dict:
+    succeeded = [r for r in results if r is not None]
+    stages: Dict[str, List[float]] = defaultdict(list)
+    for result in succeeded:
+        for stage, seconds in result.stage_timings.items():
+            stages[stage].append(seconds)
+    return {
+        "runs": len(results),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "elapsed_seconds": round(elapsed, 3),
+        "runs_per_second": round(len(succeeded) / elapsed, 3) if elapsed else 0.0,
+        "stages": {
+            stage: {
+                "count": len(values),
+                "p50": round(percentile(values, 50), 3),
+                "p95": round(percentile(values, 95), 3),
+                "p99": round(percentile(values, 99), 3),
+                "max": round(max(values), 3),
+            }
+            for stage, values in sorted(stages.items())
+        },
+    }
+
+
+def _print_report(report: Dict) -> None:
+    print(
+        f"\n{report['succeeded']}/{report['runs']} runs succeeded in {report['elapsed_seconds']}s "
+        f"({report['runs_per_second']} runs/sec)"
+    )
+    print(f"{'stage':<34}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for stage, row in report["stages"].items():
+        print(f"{stage:<34}{row['count']:>6}{row['p50']:>10.3f}{row['p95']:>10.3f}{row['p99']:>10.3f}{row['max']:>10.3f}")
+    for provider, counts in (report.get("providers") or {}).items():
+        print(f"  {provider}: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+
+
+async def _provider_stats(fake_url: str) -> Optional[Dict]:
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as http:
+            resp = await http.get(f"{fake_url.rstrip('/')}/_stats")
+            resp.raise_for_status()
+            return resp.json().get("stats")
+    except Exception as exc:
+        print(f"Could not read fake provider stats: {exc}")
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    client = await Client.connect(args.temporal_address, namespace=settings.temporal_namespace)
+    limit = asyncio.Semaphore(max(args.concurrency, 1))
+    prefix = uuid.uuid4().hex[:8]
+    started = time.monotonic()
+    results = await asyncio.gather(*(_run_one(client, i, prefix, limit) for i in range(args.runs)))
+    report = _report(list(results), time.monotonic() - started)
+    if args.fake_url:
+        report["providers"] = await _provider_stats(args.fake_url)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.load_driver", description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="Total workflows to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="Workflows in flight at once")
+    parser.add_argument("--temporal-address", default=settings.temporal_address)
+    parser.add_argument("--fake-url", default="http://127.0.0.1:9100", help="Fake provider server for request stats")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    _print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import pytest
+
+from app import storage
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point document storage and its metadata index at a throwaway directory."""
+    monkeypatch.setattr(storage, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(storage, "INDEX_PATH", tmp_path / "index.sqlite3")
+    return tmp_path
@@ -0,0 +1,102 @@
+import asyncio
+import dataclasses
+
+import pytest
+from temporalio.testing import ActivityEnvironment
+
+from app import activities, agent_wall, telemetry
+from app.clients import browser_use
+from app.config import settings
+from app.models import BrowsingPolicy, CompanyInput, LinkupResult, PageExtraction
+
+
+@pytest.fixture
+def fake_browser(tmp_path, monkeypatch):
+    """Browser Use stand-in that records peak concurrency; scoring is stubbed out."""
+    state = {"active": 0, "peak": 0}
+
+    async def extract_page(url, company_name):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.05)
+        state["active"] -= 1
+        return {"page_type": "about", "raw_text_excerpt": url}
+
+    async def score_batch(pages, persona):
+        return {slot: 0.5 for slot in pages}
+
+    monkeypatch.setattr(agent_wall, "RUNS_DIR", tmp_path / "runs")
+    monkeypatch.setattr(browser_use, "extract_page", extract_page)
+    monkeypatch.setattr(activities, "_score_usefulness_batch", score_batch)
+    monkeypatch.setattr(settings, "extraction_cache_enabled", False)
+    monkeypatch.setattr(settings, "page_yield_ranking_enabled", False)
+    monkeypatch.setattr(settings, "batch_scoring_enabled", True)
+    return state
+
+
+def _run(company: str):
+    results = [
+        LinkupResult(title=path, url=f"https://{company}-{i}.example.com/{path}", snippet="", source="linkup")
+        for i, path in enumerate(["about", "pricing", "product", "solutions"])
+    ]
+    policy = BrowsingPolicy(max_pages_per_domain=4)
+    return activities.browse_and_extract_pages(CompanyInput(name=company, domain=f"{company}.com"), policy, results, f"run-{company}")
+
+
+def test_browser_sessions_are_capped_across_concurrent_runs(fake_browser, monkeypatch):
+    monkeypatch.setattr(settings, "browse_max_concurrency", 3)
+
+    async def run():
+        return await asyncio.gather(*(_run(f"co{i}") for i in range(4)))
+
+    runs = asyncio.run(run())
+    assert [len(pages) for pages in runs] == [4, 4, 4, 4]
+    assert fake_browser["peak"] == 3
+
+
+def test_pages_keep_slot_order_and_timing(fake_browser):
+    pages = asyncio.run(_run("acme"))
+    assert [str(page.url).split("/")[-1] for page in pages] == ["about", "pricing", "product", "solutions"]
+    assert all(page.browse_seconds is not None and page.browse_seconds > 0 for page in pages)
+    assert all(page.usefulness_score == 0.5 for page in pages)
+
+
+def test_page_timeout_counts_as_browser_use_failure(fake_browser, monkeypatch):
+    async def hang(url, company_name):
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(browser_use, "extract_page", hang)
+    monkeypatch.setattr(settings, "browse_page_timeout_seconds", 0.01)
+    failures = telemetry.PROVIDER_FAILURES.labels("browser_use", "timeout")
+    before = failures._value.get()
+    pages = asyncio.run(_run("slow"))
+    assert [page.page_type for page in pages] == ["error"] * 4
+    assert failures._value.get() - before == 4
+
+
+def test_retried_attempt_keeps_heartbeated_urls(fake_browser, monkeypatch):
+    browsed = []
+    original = browser_use.extract_page
+
+    async def extract_page(url, company_name):
+        browsed.append(url)
+        return await original(url, company_name)
+
+    monkeypatch.setattr(browser_use, "extract_page", extract_page)
+    # A previous attempt ranked the URLs differently and finished its first slot.
+    urls = ["https://acme-3.example.com/solutions", "https://acme-0.example.com/about"]
+    done = PageExtraction(url=urls[0], page_type="solutions", raw_text_excerpt="done", usefulness_score=0.7)
+    env = ActivityEnvironment()
+    env.info = dataclasses.replace(
+        env.info,
+        attempt=2,
+        heartbeat_details=[{"urls": urls, "pages": {"0": done.model_dump(mode="json")}, "scored": [0]}],
+    )
+
+    async def run():
+        return await _run("acme")
+
+    pages = asyncio.run(env.run(run))
+    assert [str(page.url) for page in pages] == urls
+    assert pages[0].raw_text_excerpt == "done"
+    assert browsed == [urls[1]]
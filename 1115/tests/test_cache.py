@@ -0,0 +1,62 @@
+import sqlite3
+import time
+
+import pytest
+
+from app import cache
+from app.cache import DiskCache
+
+
+@pytest.fixture
+def disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_registry", {})
+    store = DiskCache("test", max_bytes=10_000, default_ttl_seconds=60)
+    monkeypatch.setattr(store, "path", tmp_path / "test.sqlite3")
+    return store
+
+
+def test_get_set_and_stats(disk_cache):
+    assert disk_cache.get("k") is None
+    disk_cache.set("k", {"v": 1})
+    assert disk_cache.get("k") == {"v": 1}
+    assert disk_cache.get("k", max_age_seconds=-1) is None
+    stats = disk_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expired"], stats["entries"]) == (1, 2, 1, 1)
+
+
+def test_hits_do_not_take_the_write_lock(disk_cache):
+    disk_cache.set("k", "value")
+    holder = sqlite3.connect(disk_cache.path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.monotonic()
+        for _ in range(20):
+            assert disk_cache.get("k") == "value"
+        assert time.monotonic() - started < 1.0
+    finally:
+        holder.rollback()
+        holder.close()
+    assert disk_cache.stats()["hits"] == 20
+
+
+def test_lru_touch_is_sampled(disk_cache, monkeypatch):
+    disk_cache.set("k", "value")
+    read_access = lambda: sqlite3.connect(disk_cache.path).execute("SELECT last_access FROM entries").fetchone()[0]
+    written = read_access()
+    disk_cache.get("k")
+    disk_cache.stats()
+    assert read_access() == written
+
+    monkeypatch.setattr(cache, "TOUCH_INTERVAL_SECONDS", 0.0)
+    disk_cache.get("k")
+    disk_cache.stats()
+    assert read_access() > written
+
+
+def test_eviction_keeps_size_bounded(disk_cache):
+    for i in range(50):
+        disk_cache.set(f"k{i}", "x" * 500)
+    stats = disk_cache.stats()
+    assert stats["bytes"] <= disk_cache.max_bytes
+    assert stats["evictions"] > 0
+    assert disk_cache.get("k49") == "x" * 500
@@ -0,0 +1,35 @@
+import random
+from datetime import datetime
+
+from app.context_packer import pack_metrics_context
+from app.models import CompanyInput, RunMetrics
+
+
+def _metrics(snapshot_id: str, day: int = None) -> RunMetrics:
+    return RunMetrics(
+        snapshot_id=snapshot_id,
+        policy_version="v1",
+        company=CompanyInput(name=f"Company {snapshot_id}"),
+        num_linkup_results=5,
+        num_pages_visited=4,
+        num_useful_pages=2,
+        avg_usefulness=0.5,
+        tool_failures={"linkup": 0},
+        created_at=datetime(2024, 1, day) if day else None,
+    )
+
+
+def test_metrics_are_packed_newest_first_regardless_of_arrival_order():
+    metrics = [_metrics("legacy"), _metrics("d1", 1), _metrics("d3", 3), _metrics("d2", 2)]
+    packed = [pack_metrics_context(random.sample(metrics, len(metrics)), 10_000).text for _ in range(5)]
+    assert len(set(packed)) == 1
+    order = [line.split('"snapshot_id":"')[1].split('"')[0] for line in packed[0].splitlines()[1:]]
+    assert order == ["d3", "d2", "d1", "legacy"]
+
+
+def test_truncation_drops_the_oldest_runs():
+    metrics = [_metrics(f"d{day}", day) for day in range(1, 21)]
+    packed = pack_metrics_context(list(reversed(metrics)), 200)
+    assert packed.items_dropped > 0
+    assert '"snapshot_id":"d20"' in packed.text
+    assert '"snapshot_id":"d1"' not in packed.text
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from app.incremental import has_material_change, linkup_hash, page_hash, reusable_pages
+from app.models import CompanyInput, CompanySnapshot, LinkupResult, PageExtraction
+
+
+def _result(path: str, snippet: str = "snippet") -> LinkupResult:
+    return LinkupResult(title=path, url=f"https://acme.com{path}", snippet=snippet, source="linkup")
+
+
+def _page(path: str, excerpt: str = "excerpt", score: float = 0.5, page_type: str = "about") -> PageExtraction:
+    return PageExtraction(url=f"https://acme.com{path}", page_type=page_type, raw_text_excerpt=excerpt, usefulness_score=score)
+
+
+def _snapshot(results, pages) -> CompanySnapshot:
+    return CompanySnapshot(
+        snapshot_id="previous",
+        company=CompanyInput(name="Acme", domain="acme.com"),
+        created_at=datetime(2024, 1, 1),
+        policy_version="v1",
+        linkup_results=results,
+        pages=pages,
+        brief_md="brief",
+        outreach_message="hi",
+    )
+
+
+def test_hashes_ignore_url_noise_and_scores():
+    noisy = LinkupResult(title="/about", url="https://www.acme.com/about/?utm_source=x", snippet="snippet", source="linkup")
+    assert linkup_hash(noisy) == linkup_hash(_result("/about"))
+    assert page_hash(_page("/about", score=0.1)) == page_hash(_page("/about", score=0.9))
+    assert page_hash(_page("/about", "old")) != page_hash(_page("/about", "new"))
+
+
+def test_no_previous_snapshot_reuses_nothing():
+    assert reusable_pages(None, [_result("/about")]) == []
+
+
+def test_reuses_pages_only_for_unchanged_results():
+    previous = _snapshot([_result("/about"), _result("/pricing")], [_page("/about"), _page("/pricing")])
+    current = [_result("/about"), _result("/pricing", snippet="new prices"), _result("/blog")]
+    assert [str(page.url) for page in reusable_pages(previous, current)] == ["https://acme.com/about"]
+
+
+def test_failed_pages_are_browsed_again():
+    results = [_result("/about"), _result("/pricing")]
+    previous = _snapshot(results, [_page("/about"), _page("/pricing", "Browse timed out", page_type="error")])
+    assert [str(page.url) for page in reusable_pages(previous, results)] == ["https://acme.com/about"]
+    assert has_material_change(previous, results, [_page("/about"), _page("/pricing")])
+
+
+def test_material_change_detection():
+    results = [_result("/about")]
+    previous = _snapshot(results, [_page("/about")])
+    assert not has_material_change(previous, results, [_page("/about", score=0.9)])
+    assert has_material_change(previous, results, [_page("/about", "rewritten")])
+    assert has_material_change(previous, results + [_result("/blog")], [_page("/about")])
+    assert has_material_change(previous, results, [_page("/about"), _page("/blog")])
@@ -0,0 +1,126 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app import page_stats
+from app.clients.browser_use import choose_urls
+from app.config import settings
+from app.models import CompanyInput, CompanySnapshot, PageExtraction
+
+# path, usefulness, browse seconds, page_type
+HISTORY = [
+    ("/pricing", 0.9, 4.0, "pricing"),
+    ("/about", 0.6, 3.0, "about"),
+    ("/careers", 0.05, 6.0, "careers"),
+    ("/blog/post", 0.1, 10.0, "blog"),
+]
+CANDIDATES = [
+    "https://new.example.com/careers",
+    "https://new.example.com/blog/launch",
+    "https://new.example.com/about",
+    "https://new.example.com/pricing",
+]
+
+
+@pytest.fixture
+def stats_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(page_stats, "STATS_PATH", tmp_path / "page_stats.sqlite3")
+    monkeypatch.setattr(settings, "page_yield_min_observations", 5)
+    return tmp_path
+
+
+def _snapshot(i: int) -> CompanySnapshot:
+    pages = [
+        PageExtraction(
+            url=f"https://co{i}.example.com{path}",
+            page_type=page_type,
+            raw_text_excerpt=f"co{i} {path}",
+            usefulness_score=usefulness,
+            browse_seconds=seconds,
+        )
+        for path, usefulness, seconds, page_type in HISTORY
+    ]
+    return CompanySnapshot(
+        snapshot_id=str(uuid.uuid4()),
+        company=CompanyInput(name=f"co{i}", domain=f"co{i}.example.com"),
+        created_at=datetime(2024, 1, 1),
+        policy_version="v1",
+        linkup_results=[],
+        pages=pages,
+        brief_md="",
+        outreach_message="",
+    )
+
+
+def test_path_pattern():
+    assert page_stats.path_pattern("https://www.acme.com/") == "/"
+    assert page_stats.path_pattern("https://acme.com/Pricing/") == "/pricing"
+    assert page_stats.path_pattern("https://acme.com/blog/2024/post") == "/blog/*"
+    assert page_stats.path_pattern("https://acme.com/12345/item") == "/:id/*"
+
+
+def test_no_history_no_estimates(stats_path):
+    assert page_stats.estimate(CANDIDATES) == {}
+
+
+def test_recording_is_idempotent(stats_path):
+    snapshot = _snapshot(0)
+    assert page_stats.record_snapshot(snapshot) == len(HISTORY)
+    assert page_stats.record_snapshot(snapshot) == 0
+    carried_over = snapshot.model_copy(update={"snapshot_id": "refresh"})
+    assert page_stats.record_snapshot(carried_over) == 0
+
+
+def test_estimates_rank_by_yield_and_shrink_unseen_paths(stats_path):
+    for i in range(6):
+        page_stats.record_snapshot(_snapshot(i))
+    estimates = page_stats.estimate(CANDIDATES + ["https://new.example.com/unseen"])
+
+    # Pulled from its observed 0.9 towards the global mean, less so with every observation.
+    assert 0.8 < estimates["https://new.example.com/pricing"].usefulness < 0.9
+    assert estimates["https://new.example.com/careers"].observations == 6
+    unseen = estimates["https://new.example.com/unseen"]
+    assert unseen.observations == 0
+    assert unseen.usefulness == pytest.approx(sum(u for _, u, _, _ in HISTORY) / len(HISTORY))
+    yields = {url: e.yield_per_second for url, e in estimates.items()}
+    assert max(yields, key=yields.get) == "https://new.example.com/pricing"
+
+
+def test_choose_urls_without_history_prefers_paths():
+    assert choose_urls(CANDIDATES, ["/about", "/pricing"], 3) == CANDIDATES[2:] + CANDIDATES[:1]
+
+
+def test_choose_urls_ranks_and_drops_low_yield_paths(stats_path):
+    for i in range(6):
+        page_stats.record_snapshot(_snapshot(i))
+    estimates = page_stats.estimate(CANDIDATES)
+    chosen = choose_urls(CANDIDATES, [], 4, estimates, min_usefulness=0.2)
+    assert chosen == ["https://new.example.com/pricing", "https://new.example.com/about"]
+
+
+def test_choose_urls_keeps_sparse_paths(stats_path):
+    for i in range(2):
+        page_stats.record_snapshot(_snapshot(i))
+    chosen = choose_urls(CANDIDATES, [], 4, page_stats.estimate(CANDIDATES), min_usefulness=0.2)
+    assert sorted(chosen) == sorted(CANDIDATES)
+
+
+def test_choose_urls_explores_a_dropped_path(stats_path):
+    for i in range(6):
+        page_stats.record_snapshot(_snapshot(i))
+    estimates = page_stats.estimate(CANDIDATES)
+    chosen = choose_urls(CANDIDATES, [], 2, estimates, min_usefulness=0.2, explore_rate=1.0)
+    assert chosen[0] == "https://new.example.com/pricing"
+    assert chosen[1] in CANDIDATES[:2]
+
+
+def test_backfill_reads_stored_snapshots(stats_path, data_dir):
+    from app import storage
+
+    for i in range(3):
+        snapshot = _snapshot(i)
+        storage.write_json(f"snapshots/{snapshot.snapshot_id}.json", snapshot.model_dump(mode="json"))
+    assert page_stats.backfill() == (3, 3 * len(HISTORY))
+    assert page_stats.backfill() == (3, 0)
+    assert page_stats.backfill(rebuild=True) == (3, 3 * len(HISTORY))
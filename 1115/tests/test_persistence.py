@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+from app import persistence, storage
+from app.clients import smartbuckets
+from app.config import settings
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    """Fake SmartBuckets: paths starting with ``slow/`` take 2s to upload."""
+    uploaded = []
+
+    async def put_json(path, payload):
+        if path.startswith("slow/"):
+            await asyncio.sleep(2.0)
+        uploaded.append(path)
+
+    monkeypatch.setattr(settings, "liquid_metal_api_key", "test")
+    monkeypatch.setattr(settings, "persistence_fsync", False)
+    monkeypatch.setattr(smartbuckets, "put_json", put_json)
+    return uploaded
+
+
+def test_write_and_upload_complete(data_dir, uploads):
+    async def run():
+        return await asyncio.gather(
+            persistence.write_json("snapshots/a.json", {"n": 1}), persistence.upload_json("x/a.json", {"n": 1})
+        )
+
+    assert asyncio.run(run()) == [None, True]
+    assert storage.read_json("snapshots/a.json") == {"n": 1}
+    assert uploads == ["x/a.json"]
+
+
+def test_caller_does_not_wait_for_other_uploads(data_dir, uploads):
+    async def run():
+        slow = persistence.upload_json("slow/other.json", {})
+        started = time.monotonic()
+        await asyncio.gather(persistence.write_json("metrics/m.json", {}), persistence.upload_json("fast/m.json", {}))
+        elapsed = time.monotonic() - started
+        slow.cancel()
+        return elapsed
+
+    assert asyncio.run(run()) < 1.0
+
+
+def test_local_write_failure_raises_from_future(data_dir, uploads, monkeypatch):
+    def fail(items, fsync=False, fmt=None):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(storage, "write_many", fail)
+
+    async def run():
+        await persistence.write_json("metrics/m.json", {})
+
+    with pytest.raises(OSError, match="disk full"):
+        asyncio.run(run())
+
+
+def test_upload_failure_is_not_raised(data_dir, monkeypatch):
+    async def put_json(path, payload):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(settings, "liquid_metal_api_key", "test")
+    monkeypatch.setattr(smartbuckets, "put_json", put_json)
+
+    async def run():
+        return await persistence.upload_json("x/a.json", {})
+
+    assert asyncio.run(run()) is False
@@ -0,0 +1,56 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.clients import rate_limit
+from app.config import settings
+
+
+@pytest.fixture
+def limiter(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "LIMITER_PATH", tmp_path / "rate_limits.sqlite3")
+    monkeypatch.setattr(rate_limit, "_initialized", False)
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_rps", {"linkup": 2.0})
+    return rate_limit
+
+
+def test_burst_then_wait(limiter):
+    assert limiter._try_acquire("linkup") == 0.0
+    assert limiter._try_acquire("linkup") == 0.0
+    assert limiter._try_acquire("linkup") == pytest.approx(0.5, abs=0.05)
+
+
+def test_429_blocks_until_retry_after(limiter):
+    asyncio.run(limiter.record_response("linkup", 429, "3"))
+    assert limiter._try_acquire("linkup") == pytest.approx(3.0, abs=0.1)
+
+
+def test_lock_contention_does_not_block_event_loop(limiter):
+    limiter._try_acquire("linkup")  # create the database
+    holder = sqlite3.connect(limiter.LIMITER_PATH, isolation_level=None, check_same_thread=False)
+    holder.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.5, holder.rollback).start()
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.05)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        started = time.monotonic()
+        await limiter.acquire("linkup")
+        task.cancel()
+        return time.monotonic() - started, ticks
+
+    elapsed, ticks = asyncio.run(run())
+    holder.close()
+    assert elapsed >= 0.4
+    assert ticks >= 5
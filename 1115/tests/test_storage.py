@@ -0,0 +1,74 @@
+import os
+
+from app import storage
+
+
+def _write(name, written_at_ns, fmt="json"):
+    target = storage.write_many([(f"snapshots/{name}.json", {"snapshot_id": name})], fmt=fmt, written_at=written_at_ns)[0]
+    os.utime(target, ns=(written_at_ns, written_at_ns))
+
+
+def _newest_first():
+    items, _ = storage.list_indexed("snapshots", limit=10)
+    return [item["snapshot_id"] for item in items]
+
+
+def test_round_trip_every_available_format(data_dir):
+    for fmt in ("json", "compact", "gzip"):
+        storage.write_many([(f"metrics/{fmt}.json", {"fmt": fmt})], fmt=fmt)
+        assert storage.read_json(f"metrics/{fmt}.json") == {"fmt": fmt}
+
+
+def test_rewrite_drops_other_format_variants(data_dir):
+    storage.write_many([("metrics/m.json", {"v": 1})], fmt="json")
+    storage.write_many([("metrics/m.json", {"v": 2})], fmt="gzip")
+    assert [file.name for _, file in storage.iter_documents("metrics")] == ["m.json.gz"]
+    assert storage.read_json("metrics/m.json") == {"v": 2}
+
+
+def test_migration_rewrites_and_keeps_listing_order(data_dir):
+    second = 1_000_000_000
+    _write("s2", 1 * second)
+    _write("s0", 2 * second)
+    _write("s1", 3 * second)
+    assert _newest_first() == ["s1", "s0", "s2"]
+
+    assert storage.migrate_documents("gzip", ["snapshots"]) == 3
+    assert sorted(file.name for _, file in storage.iter_documents("snapshots")) == [
+        "s0.json.gz",
+        "s1.json.gz",
+        "s2.json.gz",
+    ]
+    assert _newest_first() == ["s1", "s0", "s2"]
+
+    storage.rebuild_index()
+    assert _newest_first() == ["s1", "s0", "s2"]
+
+
+def test_migration_skips_documents_already_in_format(data_dir):
+    _write("s0", 1_000_000_000, fmt="gzip")
+    assert storage.migrate_documents("gzip", ["snapshots"]) == 0
+
+
+def test_index_is_set_up_once_and_lists_bodies_from_files(data_dir, monkeypatch):
+    monkeypatch.setattr(storage, "_index_ready", None)
+    calls = []
+    init = storage._init_index
+    monkeypatch.setattr(storage, "_init_index", lambda conn: calls.append(1) or init(conn))
+    storage.write_json("metrics/m1.json", {"company": {"name": "Acme"}, "policy_version": "v2", "excerpt": "x" * 5000})
+    items, cursor = storage.list_indexed("metrics", company="acme", policy_version="v2")
+    assert [item["excerpt"] for item in items] == ["x" * 5000]
+    assert cursor is None
+    assert calls == [1]
+
+
+def test_listing_paginates_with_cursor(data_dir):
+    for i in range(5):
+        _write(f"s{i}", (i + 1) * 1_000_000_000)
+    first, cursor = storage.list_indexed("snapshots", limit=2)
+    second, cursor = storage.list_indexed("snapshots", limit=2, cursor=cursor)
+    third, cursor = storage.list_indexed("snapshots", limit=2, cursor=cursor)
+    assert [i["snapshot_id"] for i in first + second + third] == ["s4", "s3", "s2", "s1", "s0"]
+    assert cursor is None
+
+
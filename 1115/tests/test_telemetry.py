@@ -0,0 +1,40 @@
+from prometheus_client import CollectorRegistry, generate_latest
+
+from app import agent_wall, cache, telemetry
+from app.cache import DiskCache, MemoryTTLCache
+
+
+def _scrape(include_shared: bool, monkeypatch, tmp_path) -> str:
+    monkeypatch.setattr(cache, "_registry", {})
+    monkeypatch.setattr(cache, "_memory_registry", {})
+    disk = DiskCache("test_disk", max_bytes=1024, default_ttl_seconds=60)
+    monkeypatch.setattr(disk, "path", tmp_path / "test_disk.sqlite3")
+    disk.get("missing")
+    memory = MemoryTTLCache(60, name="test_memory")
+    memory.set("k", 1)
+    memory.get("k")
+    registry = CollectorRegistry()
+    registry.register(telemetry._CacheCollector(include_shared))
+    return generate_latest(registry).decode()
+
+
+def test_cache_metric_names(monkeypatch, tmp_path):
+    text = _scrape(True, monkeypatch, tmp_path)
+    assert 'researcher_cache_hits_total{cache="test_memory"} 1.0' in text
+    assert 'researcher_cache_misses_total{cache="test_disk"} 1.0' in text
+    assert 'researcher_cache_hit_ratio{cache="test_memory"} 1.0' in text
+
+
+def test_shared_disk_counters_exported_only_when_asked(monkeypatch, tmp_path):
+    text = _scrape(False, monkeypatch, tmp_path)
+    assert 'cache="test_memory"' in text
+    assert 'cache="test_disk"' not in text
+
+
+def test_tool_failures_counted_per_temporal_run(monkeypatch, tmp_path):
+    monkeypatch.setattr(agent_wall, "RUNS_DIR", tmp_path)
+    agent_wall.record_tool_failure("research-acme", "linkup", "timeout", "first")
+    agent_wall.record_tool_failure("research-acme", "linkup", "timeout", "second")
+    agent_wall.record_tool_failure("research-acme", "browser_use", "timeout", "second")
+    assert agent_wall.tool_failure_counts("research-acme", "second") == {"linkup": 1, "browser_use": 1}
+    assert agent_wall.tool_failure_counts("research-acme") == {"linkup": 2, "browser_use": 1}